@@ -21,6 +21,7 @@
 import gi
 import rb
 import os
+from gi.repository import GLib
 from gi.repository import GObject
 from gi.repository import Gio
 from gi.repository import Gtk
@@ -29,6 +30,13 @@ gi.require_version('Peas', '1.0')
 from gi.repository import Peas
 from gi.repository import RB
 
+from alttoolbar_coverart import CoverArtCache
+from alttoolbar_finder import WidgetFinder
+from alttoolbar_instrument import Instrumentation
+from alttoolbar_instrument import instrument
+from alttoolbar_label import TimeLabel
+from alttoolbar_log import log
+from alttoolbar_log import setup_logging
 from alttoolbar_plugins import PluginDialog
 from alttoolbar_preferences import CoverLocale
 from alttoolbar_preferences import GSetting
@@ -78,6 +86,7 @@ class AltToolbarPlugin(GObject.Object, Peas.Activatable):
     show_album_art = GObject.property(type=bool, default=False)
     show_song_position_slider = GObject.property(type=bool, default=False)
     playing_label = GObject.property(type=bool, default=False)
+    label_template = GObject.property(type=str, default='')
 
     # signals
     # toolbar-visibility - bool parameter True = visible, False = not visible
@@ -92,6 +101,9 @@ class AltToolbarPlugin(GObject.Object, Peas.Activatable):
         GObject.Object.__init__(self)
         self.appshell = None
         self.sh_psc = self.sh_op = self.sh_pc = None
+        self._page_change_id = None
+        self._page_change_page = None
+        self._song_property_change_id = None
 
     def do_activate(self):
         """
@@ -106,6 +118,8 @@ class AltToolbarPlugin(GObject.Object, Peas.Activatable):
 
         # Prepare internal variables
         self.song_duration = 0
+        self._time_label = None
+        self._time_label_format = TimeLabel()
         self.entry = None
         self._plugin_dialog_width = 760
         self._plugin_dialog_height = 550
@@ -126,6 +140,8 @@ class AltToolbarPlugin(GObject.Object, Peas.Activatable):
         # get values from gsettings
         self.gs = GSetting()
         self.plugin_settings = self.gs.get_setting(self.gs.Path.PLUGIN)
+        setup_logging(self.plugin_settings[self.gs.PluginKey.LOG_LEVEL])
+        Instrumentation().reset()
 
         display_type = self.plugin_settings[self.gs.PluginKey.DISPLAY_TYPE]
         self.volume_control = self.plugin_settings[
@@ -209,7 +225,7 @@ class AltToolbarPlugin(GObject.Object, Peas.Activatable):
 
         while response >= 0:
             response = dlg.run()
-            print(response)
+            log.debug("%s", response)
 
         self._plugin_dialog_width, self._plugin_dialog_height = dlg.get_size()
         dlg.destroy()
@@ -276,6 +292,18 @@ class AltToolbarPlugin(GObject.Object, Peas.Activatable):
         self.appshell.add_app_menuitems(view_menu_ui,
                                         'AltToolbarPluginActions', 'view')
 
+        if Instrumentation().enabled:
+            # no menu entry - activate with
+            # gapplication action org.gnome.Rhythmbox3 DumpHandlerStats
+            self.instrument_action_group = \
+                ActionGroup(self.shell, 'AltToolbarPluginInstrumentActions')
+            self.instrument_action_group.add_action(
+                func=Instrumentation().dump,
+                action_name='DumpHandlerStats',
+                label="Dump Handler Statistics",
+                action_type='app')
+            self.appshell.insert_action_group(self.instrument_action_group)
+
     def _connect_properties(self):
         """
           bind plugin properties to various gsettings that we dynamically
@@ -284,47 +312,61 @@ class AltToolbarPlugin(GObject.Object, Peas.Activatable):
         self.plugin_settings.bind(self.gs.PluginKey.PLAYING_LABEL, self,
                                   'playing_label',
                                   Gio.SettingsBindFlags.GET)
+        self.plugin_settings.bind(self.gs.PluginKey.LABEL_TEMPLATE, self,
+                                  'label_template',
+                                  Gio.SettingsBindFlags.GET)
 
     def _connect_signals(self):
         """
           connect to various rhythmbox signals that the toolbars need
         """
         self.sh_display_page_tree = self.shell.props.display_page_tree.connect(
-            "selected", self.on_page_change
+            "selected", instrument(self.on_page_change)
         )
 
-        self.sh_psc = self.shell_player.connect("playing-song-changed",
-                                                self._sh_on_song_change)
+        self.sh_psc = self.shell_player.connect(
+            "playing-song-changed", instrument(self._sh_on_song_change))
 
-        self.sh_op = self.shell_player.connect("elapsed-changed",
-                                               self._sh_on_playing)
+        self.sh_op = self.shell_player.connect(
+            "elapsed-changed", instrument(self._sh_on_playing))
 
-        self.sh_pc = self.shell_player.connect("playing-changed",
-                                               self._sh_on_playing_change)
+        self.sh_pc = self.shell_player.connect(
+            "playing-changed", instrument(self._sh_on_playing_change))
 
         self.sh_pspc = self.shell_player.connect(
             "playing-song-property-changed",
-            self._sh_on_song_property_changed)
+            instrument(self._sh_on_song_property_changed))
+
+        self.sh_suspended = self.toolbar_type.connect(
+            'notify::suspended', instrument(self._on_toolbar_suspended))
+
+        if hasattr(self.toolbar_type, 'song_progress'):
+            self.toolbar_type.song_progress.connect(
+                'seek-preview', instrument(self._on_seek_preview))
 
         self.rb_settings = Gio.Settings.new('org.gnome.rhythmbox')
 
         self.rb_settings.bind('show-album-art', self, 'show_album_art',
                               Gio.SettingsBindFlags.GET)
         self.connect('notify::show-album-art',
-                     self.show_album_art_settings_changed)
+                     instrument(self.show_album_art_settings_changed))
         self.show_album_art_settings_changed(None)
 
         self.rb_settings.bind('show-song-position-slider', self,
                               'show_song_position_slider',
                               Gio.SettingsBindFlags.GET)
-        self.connect('notify::show-song-position-slider',
-                     self.show_song_position_slider_settings_changed)
+        self.connect(
+            'notify::show-song-position-slider',
+            instrument(self.show_song_position_slider_settings_changed))
         self.show_song_position_slider_settings_changed(None)
 
     def _sh_on_song_property_changed(self, sp, uri, property, old, new):
         """
            shell-player "playing-song-property-changed" signal handler
         """
+        if self.toolbar_type.suspended:
+            return
+
         if sp.get_playing() and property in \
                 ('artist',
                  'album',
@@ -332,9 +374,22 @@ class AltToolbarPlugin(GObject.Object, Peas.Activatable):
                  RB.RHYTHMDB_PROP_STREAM_SONG_ARTIST,
                  RB.RHYTHMDB_PROP_STREAM_SONG_ALBUM,
                  RB.RHYTHMDB_PROP_STREAM_SONG_TITLE):
-            entry = sp.get_playing_entry()
+            # several properties usually change together - redisplay once
+            # they have all been signalled
+            if self._song_property_change_id is None:
+                self._song_property_change_id = GLib.idle_add(
+                    instrument(self._process_song_property_change),
+                    priority=GLib.PRIORITY_HIGH_IDLE)
+
+    def _process_song_property_change(self):
+        self._song_property_change_id = None
+
+        entry = self.shell_player.get_playing_entry()
+        if entry is not None and not self.toolbar_type.suspended:
             self.toolbar_type.display_song(entry)
 
+        return False
+
     def _sh_on_playing_change(self, player, playing):
         """
         Shell-player 'playing-change' signal handler.
@@ -347,6 +402,7 @@ class AltToolbarPlugin(GObject.Object, Peas.Activatable):
             if (hasattr(self.toolbar_type, "total_time_label")):
                 label = ""
                 self.toolbar_type.total_time_label.set_markup(label)
+                self._time_label = label
 
     def _sh_on_song_change(self, player, entry):
         """
@@ -357,6 +413,13 @@ class AltToolbarPlugin(GObject.Object, Peas.Activatable):
         else:
             self.song_duration = 0
 
+        self._time_label_format.set_duration(self.song_duration)
+
+        if self.toolbar_type.suspended:
+            # nothing to see - the display is resynced when the
+            # play-controls become visible again
+            return
+
         if hasattr(self.toolbar_type, 'song_progress'):
             self.toolbar_type.song_progress.adjustment.set_upper(
                 self.song_duration or 1)
@@ -366,28 +429,52 @@ class AltToolbarPlugin(GObject.Object, Peas.Activatable):
         """
         Shell-player 'elapsed-changed' signal handler.
         """
-        if self.song_duration == 0:
+        if self.song_duration == 0 or self.toolbar_type.suspended:
             return
         try:
             slider = self.toolbar_type.song_progress
         except AttributeError:
             return
-        with slider.handler_block(slider.changed_callback_id):
-            slider.adjustment.set_value(seconds)
-
-        minutes, seconds = divmod(seconds, 60)
-        hours, minutes = divmod(minutes, 60)
-        total_minutes, total_seconds = divmod(self.song_duration, 60)
-        total_hours, total_minutes = divmod(total_minutes, 60)
-
-        if total_hours:
-            label = "<small>{}:{:02}:{:02} / {}:{:02}:{:02}</small>".format(
-                hours, minutes, seconds,
-                total_hours, total_minutes, total_seconds)
+        if slider.dragging:
+            # dont fight the user for the slider
+            if slider.seek_on_release:
+                return  # the time label is showing the seek preview
         else:
-            label = "<small>{:02}:{:02} / {:02}:{:02}</small>".format(
-                minutes, seconds, total_minutes, total_seconds)
-        self.toolbar_type.total_time_label.set_markup(label)
+            with slider.handler_block(slider.changed_callback_id):
+                slider.adjustment.set_value(seconds)
+
+        self._update_time_label(seconds)
+
+    def _on_seek_preview(self, slider, seconds):
+        """
+        Slider 'seek-preview' signal handler - show the time the slider is
+        being dragged to
+        """
+        if self.song_duration != 0:
+            self._update_time_label(int(seconds))
+
+    def _update_time_label(self, seconds):
+        label = self._time_label_format.format(seconds)
+
+        if label != self._time_label:
+            self._time_label = label
+            self.toolbar_type.total_time_label.set_markup(label)
+
+    def _on_toolbar_suspended(self, *args):
+        """
+           toolbar notify::suspended signal handler - once the play-controls
+           can be seen again bring them up-to-date with the player
+        """
+        if self.toolbar_type.suspended:
+            return
+
+        self._time_label = None
+        self._sh_on_song_change(self.shell_player,
+                                self.shell_player.get_playing_entry())
+
+        ret, elapsed = self.shell_player.get_playing_time()
+        if ret:
+            self._sh_on_playing(self.shell_player, elapsed)
 
     def on_skip_backward(self, *args):
         """
@@ -396,11 +483,11 @@ class AltToolbarPlugin(GObject.Object, Peas.Activatable):
         sp = self.object.props.shell_player
         if (sp.get_playing()[1]):
             seek_time = sp.get_playing_time()[1] - seek_backward_time
-            print(seek_time)
+            log.debug("%s", seek_time)
             if (seek_time < 0):
                 seek_time = 0
 
-            print(seek_time)
+            log.debug("%s", seek_time)
             sp.set_playing_time(seek_time)
 
     def on_skip_forward(self, *args):
@@ -432,12 +519,35 @@ class AltToolbarPlugin(GObject.Object, Peas.Activatable):
     def on_page_change(self, display_page_tree, page):
         """
            sources display-tree signal handler
+
+           page changes are coalesced - only the most recently selected
+           page is processed once the main loop is idle
         """
-        print("page changed", page)
+        self._page_change_page = page
+
+        if self._page_change_id is None:
+            self._page_change_id = GLib.idle_add(
+                instrument(self._process_page_change),
+                priority=GLib.PRIORITY_DEFAULT_IDLE)
+
+    def _process_page_change(self, *args):
+        page = self._page_change_page
+        self._page_change_page = None
+        self._page_change_id = None
+
+        log.debug("page changed %s", page)
+        finder = WidgetFinder()
+        traversed = finder.traversed
+
         self.toolbar_type.reset_categories_pos(page)
         self.toolbar_type.reset_toolbar(page)
         self.toolbar_type.reset_entryview(page)
 
+        log.debug("page change traversed %s widgets",
+                  finder.traversed - traversed)
+
+        return False
+
     @staticmethod
     def find(node, search_id, search_type, button_label=None):
         """
@@ -455,43 +565,30 @@ class AltToolbarPlugin(GObject.Object, Peas.Activatable):
         :return:N/A
         """
 
-        # Couldn't find better way to find widgets than loop through them
-        # print("by_name %s by_id %s" % (node.get_name(),
-        # Gtk.Buildable.get_name(node)))
-
-        def extract_label(button):
-            label = button.get_label()
-            if label:
-                return label
-
-            child = button.get_child()
-            if child and child.get_name() == "GtkLabel":
-                return child.get_text()
-
-            return None
-
-        if isinstance(node, Gtk.Buildable):
-            if search_type == 'by_id':
-                if Gtk.Buildable.get_name(node) == search_id:
-                    if button_label is None or (
-                            'Button' in node.get_name() and extract_label(
-                            node) == button_label):
-                        return node
-            elif search_type == 'by_name':
-                if node.get_name() == search_id:
-                    if button_label is None or (
-                            'Button' in node.get_name() and extract_label(
-                            node) == button_label):
-                        return node
-
-        if isinstance(node, Gtk.Container):
-            for child in node.get_children():
-                ret = AltToolbarPlugin.find(child, search_id, search_type,
-                                            button_label)
-                if ret:
-                    return ret
-
-        return None
+        # results are indexed so repeated searches of an unchanged widget
+        # tree do not walk the tree again
+        return WidgetFinder().find(node, search_id, search_type, button_label)
+
+    @staticmethod
+    def find_many(node, queries):
+        """
+        find several GTK Widgets with a single walk of the widget tree
+        :param node: node is the starting container to find from
+        :param queries: list of (search_id, search_type) or
+        (search_id, search_type, button_label) tuples - see find
+        :return: list of GtkWidget or None in the same order as queries
+        """
+
+        return WidgetFinder().find_many(node, queries)
+
+    @staticmethod
+    def forget(node):
+        """
+        forget the widgets found by searches starting from node
+        :param node: node is the starting container searched from
+        """
+
+        WidgetFinder().forget(node)
 
     def do_deactivate(self):
         """
@@ -500,14 +597,23 @@ class AltToolbarPlugin(GObject.Object, Peas.Activatable):
         """
         del self.db
 
+        Instrumentation().dump()
+
         if self.sh_op:
             self.shell_player.disconnect(self.sh_op)
             self.shell_player.disconnect(self.sh_psc)
             self.shell_player.disconnect(self.sh_pc)
             self.shell_player.disconnect(self.sh_pspc)
+            self.toolbar_type.disconnect(self.sh_suspended)
             # self.disconnect(self.sh_display_page)
             self.shell.props.display_page_tree.disconnect(
                 self.sh_display_page_tree)
+            if self._page_change_id is not None:
+                GLib.source_remove(self._page_change_id)
+                self._page_change_id = None
+            if self._song_property_change_id is not None:
+                GLib.source_remove(self._song_property_change_id)
+                self._song_property_change_id = None
             del self.shell_player
 
         if self.appshell:
@@ -517,6 +623,9 @@ class AltToolbarPlugin(GObject.Object, Peas.Activatable):
 
         self.toolbar_type.cleanup()
 
+        WidgetFinder().clear()
+        CoverArtCache().clear()
+
         del self.shell
 
     def toggle_visibility(self, action, param=None, data=None):
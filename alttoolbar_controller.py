@@ -16,6 +16,7 @@
 # along with this program; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
 
+from alttoolbar_log import log
 from alttoolbar_preferences import CoverLocale
 from gi.repository import GObject
 from gi.repository import Gio
@@ -40,6 +41,7 @@ class AltControllerBase(GObject.Object):
         """
         self.header = header
         self.find = self.header.find  # convenience function
+        self.find_many = self.header.find_many
 
         self._pixbuf = None
 
@@ -146,7 +148,7 @@ class AltGenericController(AltControllerBase):
         super(AltGenericController, self).__init__(header)
 
         self.centre_controls = {}
-        self.end_controls = {}
+        self.end_controls = header.new_page_registry()
 
     def get_category(self):
         return AltControllerCategory.LOCAL
@@ -160,24 +162,29 @@ class AltGenericController(AltControllerBase):
 
     def get_toolbar(self, source):
 
-        toolbar = self.find(source, 'RBSourceToolbar', 'by_name')
-        print(toolbar)
-        print(source)
+        toolbar = self.header.get_page_anatomy(source).source_toolbar
+        log.debug("%s", toolbar)
+        log.debug("%s", source)
 
         return toolbar
 
     def get_search_entry(self, container):
         if container is None:
-            print("no container to search")
+            log.debug("no container to search")
             return None, None
-        search = self.find(container, 'RBSearchEntry', 'by_name')
+        search, entry = self.find_many(container,
+                                       [('RBSearchEntry', 'by_name'),
+                                        ('GtkEntry', 'by_name')])
 
         if not search:
-            print("no RBSearchEntry found")
+            log.debug("no RBSearchEntry found")
             return None, None
 
-        entry = self.find(search, 'GtkEntry', 'by_name')
-        print(entry)
+        if entry is None or not entry.is_ancestor(search):
+            # the first GtkEntry in the container is not the search entry
+            entry = self.find(search, 'GtkEntry', 'by_name')
+
+        log.debug("%s", entry)
         return search, entry
 
     def moveto_searchbar(self, toolbar, search, searchbar):
@@ -194,10 +201,10 @@ class AltGenericController(AltControllerBase):
         val, browser_button = self.header.is_browser_view(source)
         if not val:
             # if not a browser_view based source then default just to the title
-            print("no browser view")
+            log.debug("no browser view")
             self.header.set_library_box_sensitive(False)
         else:
-            print("browser view found")
+            log.debug("browser view found")
             browser_button.set_visible(False)
             self.header.set_library_box_sensitive(True)
 
@@ -206,7 +213,8 @@ class AltGenericController(AltControllerBase):
         toolbar = self.get_toolbar(source)
         if not toolbar:
             # there is no source-bar so the header is empty
-            print("no toolbar so nothing left to do - cleanup endbox and exit")
+            log.debug("no toolbar so nothing left to do - "
+                      "cleanup endbox and exit")
             self.remove_controls(self.header.end_box)
             return
 
@@ -215,12 +223,12 @@ class AltGenericController(AltControllerBase):
         if source not in self.end_controls:
             # this is the first time for the source so extract the
             # RBSearchEntry
-            print("first time around")
+            log.debug("first time around")
             controls = {}
 
             self.remove_controls(self.header.end_box)
 
-            print(toolbar)  # should be the RBSourceToolbar
+            log.debug("%s", toolbar)  # should be the RBSourceToolbar
             search, entry = self.get_search_entry(toolbar)
             if not search:
                 return
@@ -236,7 +244,7 @@ class AltGenericController(AltControllerBase):
             # the second position in a box - the first position being the
             # searchbar
             children = source.get_children()
-            print(children)
+            log.debug("%s", children)
             # We assume the first container in a source is a GtkNotebook
             first = children[0]
             box = Gtk.Box()
@@ -276,10 +284,10 @@ class AltGenericController(AltControllerBase):
             controls['search_button'] = search_button
             self.header.current_search_button = search_button
             self.end_controls[source] = controls
-            print(controls)
+            log.debug("%s", controls)
         else:
-            print("second time around")
-            print(self.end_controls[source])
+            log.debug("second time around")
+            log.debug("%s", self.end_controls[source])
             search = self.end_controls[source]['searchbar']
             if self.header.searchbar:
                 self.header.searchbar.set_visible(False)
@@ -417,8 +425,14 @@ class AltCoverArtBrowserController(AltGenericController):
           override - use the GtkEntry in the coverartbrowser
         """
 
-        entrysearch = self.find(toolbar, 'entry_search_alignment', 'by_id')
-        entry = self.find(entrysearch, 'GtkEntry', 'by_name')
+        entrysearch, entry = \
+            self.find_many(toolbar, [('entry_search_alignment', 'by_id'),
+                                     ('GtkEntry', 'by_name')])
+
+        if entrysearch is None:
+            entry = None
+        elif entry is None or not entry.is_ancestor(entrysearch):
+            entry = self.find(entrysearch, 'GtkEntry', 'by_name')
 
         return entrysearch, entry
 
@@ -451,7 +465,7 @@ class AltCoverArtPlaySourceController(AltGenericController):
         if not self._has_toolbar:
             self._has_toolbar = self.find(source, 'RBButtonBar', 'by_name')
 
-        print("############", self._has_toolbar)
+        log.debug("button bar %s", self._has_toolbar)
         return self._has_toolbar
 
 
@@ -494,7 +508,6 @@ class AltErrorsController(AltGenericController):
                               "RBMissingFilesSource"]
 
     def valid_source(self, source):
-        print(type(source).__name__)
         for source_type in self._source_types:
             if source_type in type(source).__name__:
                 return True
@@ -601,7 +614,6 @@ class AltPlaylistController(AltGenericController):
         # locale stuff
         cl = CoverLocale()
         cl.switch_locale(cl.Locale.RB)
-        print(source.props.name)
         if source.props.name == _('My Top Rated') \
                 or source.props.name == 'My Top Rated':
             return self._toprated_gicon
@@ -667,7 +679,6 @@ class AltStandardOnlineController(AltGenericController):
 
     def valid_source(self, source):
 
-        print(type(source).__name__)
         for source_type in self._source_types:
             if source_type in type(source).__name__:
                 return True
@@ -694,7 +705,6 @@ class AltStandardLocalController(AltGenericController):
 
     def valid_source(self, source):
 
-        print(type(source).__name__)
         for source_type in self._source_types:
             if source_type in type(source).__name__:
                 return True
@@ -0,0 +1,205 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from alttoolbar_instrument import instrument
+from alttoolbar_log import log
+from gi.repository import GLib
+from gi.repository import GdkPixbuf
+
+
+def pixbuf_size(pixbuf):
+    """
+    number of bytes of pixel data held by a GdkPixbuf
+    """
+    return pixbuf.get_rowstride() * pixbuf.get_height()
+
+
+class CoverArtCache:
+    """
+    This class remembers scaled album-art pixbufs keyed by
+    (RB.ExtDB album key string, size) so that playing through an album or
+    repeatedly hovering over the cover does not rescale the same image.
+
+    The least recently used pixbufs are dropped once the memory budget is
+    exceeded.
+
+    Scaling large covers can take a long time so it is done by a small
+    pool of worker threads - results are handed back on the main loop
+    where the cache itself is only ever touched.
+    """
+    # storage for the instance reference
+    __instance = None
+
+    class __impl:
+        """ Implementation of the singleton interface """
+
+        # memory budget of the cached pixel data in bytes - about fifty
+        # 300x300 covers
+        BUDGET = 16 * 1024 * 1024
+
+        # number of worker threads used to scale covers
+        WORKERS = 2
+
+        def __init__(self):
+            self._pool = None
+            # (key string, size) -> scaled pixbuf - oldest first
+            self._cache = OrderedDict()
+            self.used = 0
+            self.hits = 0
+            self.misses = 0
+
+        def get(self, key, size):
+            """
+            return the cached pixbuf or None
+            :param key: `str` RB.ExtDBKey as a string
+            :param size: `int` width and height of the scaled pixbuf
+            """
+            pixbuf = self._cache.get((key, size))
+
+            if pixbuf is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._cache.move_to_end((key, size))
+            return pixbuf
+
+        def put(self, key, size, pixbuf):
+            """
+            remember a scaled pixbuf - evicting the least recently used ones
+            when the budget is exceeded
+            """
+            if (key, size) in self._cache:
+                self.used -= pixbuf_size(self._cache.pop((key, size)))
+
+            self._cache[(key, size)] = pixbuf
+            self.used += pixbuf_size(pixbuf)
+
+            while self.used > self.BUDGET and len(self._cache) > 1:
+                _, evicted = self._cache.popitem(last=False)
+                self.used -= pixbuf_size(evicted)
+
+        def scale(self, key, pixbuf, size,
+                  interp=GdkPixbuf.InterpType.HYPER):
+            """
+            return pixbuf scaled to size x size - from the cache if possible
+            :param key: `str` RB.ExtDBKey as a string or None to not cache
+            :param pixbuf: GdkPixbuf full sized cover
+            :param size: `int` width and height of the scaled pixbuf
+            :param interp: GdkPixbuf.InterpType used when scaling
+            """
+            if key is not None:
+                scaled = self.get(key, size)
+                if scaled is not None:
+                    return scaled
+
+            scaled = pixbuf.scale_simple(size, size, interp)
+
+            if key is not None:
+                self.put(key, size, scaled)
+
+            return scaled
+
+        def scale_async(self, key, pixbuf, size, callback,
+                        interp=GdkPixbuf.InterpType.HYPER):
+            """
+            as scale but the result is passed to callback - immediately if
+            it is already cached, otherwise on the main loop once a worker
+            has scaled it
+            :return: concurrent.futures.Future of the scaling or None if
+            the cache already had the result
+            """
+            if key is not None:
+                scaled = self.get(key, size)
+                if scaled is not None:
+                    callback(scaled)
+                    return None
+
+            return self.submit(key, pixbuf, size, callback, interp)
+
+        def submit(self, key, pixbuf, size, callback,
+                   interp=GdkPixbuf.InterpType.HYPER):
+            """
+            scale pixbuf on a worker thread without looking in the cache
+            first - the result is cached and passed to callback on the
+            main loop
+            :return: concurrent.futures.Future of the scaling
+            """
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.WORKERS)
+
+            future = self._pool.submit(pixbuf.scale_simple, size, size,
+                                       interp)
+
+            def done(future):
+                # runs on the worker thread
+                if future.cancelled():
+                    return
+
+                if future.exception() is not None:
+                    log.warning("failed to scale cover - %s",
+                                future.exception())
+                    return
+
+                GLib.idle_add(instrument(self._deliver), key, size,
+                              future.result(), callback,
+                              priority=GLib.PRIORITY_DEFAULT)
+
+            future.add_done_callback(done)
+            return future
+
+        def _deliver(self, key, size, scaled, callback):
+            if key is not None:
+                self.put(key, size, scaled)
+
+            callback(scaled)
+            return False
+
+        def clear(self):
+            """
+            forget all cached pixbufs and stop the worker threads
+            """
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+            log.debug("cover art cache - %s hits %s misses %s bytes",
+                      self.hits, self.misses, self.used)
+            self._cache = OrderedDict()
+            self.used = 0
+
+    def __init__(self):
+        """ Create singleton instance """
+        # Check whether we already have an instance
+        if CoverArtCache.__instance is None:
+            # Create and remember instance
+            CoverArtCache.__instance = CoverArtCache.__impl()
+
+        # Store instance reference as the only member in the handle
+        self.__dict__['_CoverArtCache__instance'] = CoverArtCache.__instance
+
+    def __getattr__(self, attr):
+        """ Delegate access to implementation """
+        return getattr(self.__instance, attr)
+
+    def __setattr__(self, attr, value):
+        """ Delegate access to implementation """
+        return setattr(self.__instance, attr, value)
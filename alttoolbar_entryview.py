@@ -0,0 +1,265 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+import bisect
+import json
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+
+from alttoolbar_instrument import instrument
+from alttoolbar_log import log
+from gi.repository import GLib
+
+
+def safe_string(s):
+    """
+    the letters of s - used to name pages and columns in the store
+    """
+    return ''.join([i for i in s if i.isalpha()])
+
+
+def plan_column_moves(current, remembered):
+    """
+    work out the fewest column moves that bring the remembered columns to
+    the front in their remembered order - any other columns follow in
+    their current order.
+
+    The longest run of columns already in the wanted relative order stays
+    put and every other column is moved directly after the column that
+    precedes it in the wanted order.
+
+    :param current: list of column titles in their current order
+    :param remembered: list of column titles in their remembered order
+    :return: list of (title, after title) moves to make in turn - after
+    title None means move to the first position
+    """
+    present = set(current)
+    wanted = [title for title in remembered if title in present]
+    placed = set(wanted)
+    wanted += [title for title in current if title not in placed]
+
+    position = dict((title, i) for i, title in enumerate(wanted))
+    sequence = [position[title] for title in current]
+
+    # longest increasing subsequence of the wanted positions in O(n log n)
+    tails = []
+    tail_index = []
+    previous = [-1] * len(sequence)
+    for i, pos in enumerate(sequence):
+        j = bisect.bisect_left(tails, pos)
+        if j == len(tails):
+            tails.append(pos)
+            tail_index.append(i)
+        else:
+            tails[j] = pos
+            tail_index[j] = i
+        previous[i] = tail_index[j - 1] if j else -1
+
+    stable = set()
+    i = tail_index[-1] if tail_index else -1
+    while i != -1:
+        stable.add(current[i])
+        i = previous[i]
+
+    moves = []
+    for i, title in enumerate(wanted):
+        if title not in stable:
+            moves.append((title, wanted[i - 1] if i else None))
+
+    return moves
+
+
+class ColumnStore(object):
+    """
+    remembers the column order and column widths of each entry view page.
+
+    The store is a JSON document held in memory as
+    {page name: {'order': [column title, ...],
+                 'widths': {safe column name: width, ...}}}
+    so every lookup is a dict access. It is written by atomically
+    replacing the file so that a crash cannot leave it half written.
+
+    Changes are kept in memory and written behind - once no change has
+    been made for QUIET_PERIOD milliseconds the store is flushed when the
+    main loop is idle, and only if the content actually differs from what
+    was last written.
+    """
+
+    VERSION = 2
+
+    # milliseconds without changes before the store is written
+    QUIET_PERIOD = 2000
+
+    def __init__(self, folder):
+        """
+        :param folder: `str` folder holding the store
+        """
+        self._filename = os.path.join(folder, "entryview_db.json")
+        self._pages = {}
+        # the content last read or written
+        self._written = None
+        self._flush_id = None
+
+        try:
+            with open(self._filename) as f:
+                content = json.load(f)
+
+            if content.get('version') != self.VERSION:
+                raise ValueError("wrong database version")
+
+            self._pages = content['pages']
+            self._written = self._serialize()
+        except FileNotFoundError:
+            # first run with the JSON store - bring across what the
+            # previous XML database remembered
+            self._pages = self._migrate(
+                os.path.join(folder, "entryview_db.xml"))
+            if self._pages:
+                self.flush()
+        except Exception as e:
+            # damaged or from an unknown version - start again
+            log.warning("ignoring column store %s - %s", self._filename, e)
+
+    def _migrate(self, xml_filename):
+        """
+        read the version 1 XML database - its page order is held as the
+        text of pages/page[@name] and the widths as pages/<PageName>
+        elements with column and width attributes
+        """
+        if not os.path.exists(xml_filename):
+            return {}
+
+        try:
+            root = ET.parse(xml_filename).getroot()
+            db = root.find("database")
+            if db is None or db.text != "1":
+                return {}
+
+            pages = {}
+            for node in root.iterfind("pages/page[@name]"):
+                order = [title[1:-1] for title in (node.text or "").split(',')
+                         if title]
+                pages[node.get("name")] = {'order': order, 'widths': {}}
+
+            for node in root.iterfind("pages/*[@column]"):
+                page = pages.setdefault(node.tag, {'order': [],
+                                                   'widths': {}})
+                page['widths'][node.get("column")] = int(node.get("width"))
+
+            log.info("migrated %s pages from %s", len(pages), xml_filename)
+            return pages
+        except Exception as e:
+            log.warning("cannot migrate %s - %s", xml_filename, e)
+            return {}
+
+    def get_order(self, page_name):
+        """
+        :return: list of the remembered column titles of the page or None
+        """
+        page = self._pages.get(page_name)
+        if not page or not page['order']:
+            return None
+
+        return page['order']
+
+    def get_width(self, page_name, column_title):
+        """
+        :return: `int` the remembered width of a column or None
+        """
+        page = self._pages.get(page_name)
+        if not page:
+            return None
+
+        return page['widths'].get(safe_string(column_title))
+
+    def get_layout(self, page_name):
+        """
+        :return: the remembered order and widths of the page as a value
+        that compares equal for as long as neither changes, or None
+        """
+        page = self._pages.get(page_name)
+        if not page:
+            return None
+
+        return tuple(page['order']), tuple(sorted(page['widths'].items()))
+
+    def set_columns(self, page_name, order, widths):
+        """
+        remember the columns of a page
+        :param order: list of column titles in display order
+        :param widths: dict of column title to width
+        """
+        page = {'order': list(order),
+                'widths': dict((safe_string(title), width)
+                               for title, width in widths.items())}
+
+        if self._pages.get(page_name) == page:
+            return
+
+        self._pages[page_name] = page
+
+        # restart the quiet period
+        self._cancel_flush()
+        self._flush_id = GLib.timeout_add(self.QUIET_PERIOD,
+                                          instrument(self._on_quiet))
+
+    def _on_quiet(self):
+        self._flush_id = GLib.idle_add(instrument(self._on_idle),
+                                       priority=GLib.PRIORITY_LOW)
+        return False
+
+    def _on_idle(self):
+        self._flush_id = None
+        self.flush()
+        return False
+
+    def _cancel_flush(self):
+        if self._flush_id is not None:
+            GLib.source_remove(self._flush_id)
+            self._flush_id = None
+
+    def _serialize(self):
+        return json.dumps({'version': self.VERSION, 'pages': self._pages},
+                          indent=1, sort_keys=True)
+
+    def flush(self):
+        """
+        write any unsaved changes - to a temporary file first which then
+        replaces the store in one step
+        """
+        self._cancel_flush()
+
+        content = self._serialize()
+        if content == self._written:
+            return
+
+        folder = os.path.dirname(self._filename)
+        fd, temp = tempfile.mkstemp(dir=folder, prefix=".entryview_db")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+
+            os.replace(temp, self._filename)
+            self._written = content
+        except OSError as e:
+            log.warning("cannot save %s - %s", self._filename, e)
+            if os.path.exists(temp):
+                os.remove(temp)
@@ -0,0 +1,232 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+from gi.repository import Gtk
+
+
+def extract_label(button):
+    """
+    return the text label of a button - either the button label itself
+    or the text of a GtkLabel child
+    """
+    label = button.get_label()
+    if label:
+        return label
+
+    child = button.get_child()
+    if child and child.get_name() == "GtkLabel":
+        return child.get_text()
+
+    return None
+
+
+def widget_matches(node, search_id, search_type, button_label=None):
+    """
+    returns bool if the GtkWidget node matches the search criteria
+    """
+    if not isinstance(node, Gtk.Buildable):
+        return False
+
+    if search_type == 'by_id':
+        if Gtk.Buildable.get_name(node) != search_id:
+            return False
+    elif search_type == 'by_name':
+        if node.get_name() != search_id:
+            return False
+    else:
+        return False
+
+    if button_label is None:
+        return True
+
+    return 'Button' in node.get_name() and \
+        extract_label(node) == button_label
+
+
+class WidgetFinder:
+    """
+    This class finds GTK Widgets within a widget tree. Widgets found are
+    remembered in an index keyed by
+    (root widget, search id, search type, button label).
+
+    Not every way of adding a child to a container emits a signal, so an
+    indexed widget is only used after checking that it is still inside
+    its root and still matches - otherwise the tree is searched again.
+    Searches that find nothing are never remembered, and neither are
+    searches rooted at a toplevel window since that tree changes all the
+    time. Only the root of a remembered search is watched - its
+    destruction drops its index entries.
+    """
+    # storage for the instance reference
+    __instance = None
+
+    class __impl:
+        """ Implementation of the singleton interface """
+
+        def __init__(self):
+            # (root, search_id, search_type, button_label) -> widget
+            self._index = {}
+            # root widget -> destroy signal handler id
+            self._roots = {}
+            # number of widgets visited by searches - a cheap measure of
+            # how much tree walking a given action causes
+            self.traversed = 0
+
+        def find(self, node, search_id, search_type, button_label=None):
+            """
+            find various GTK Widgets
+            :param node: node is the starting container to find from
+            :param search_id: search_id is the GtkWidget type string or
+            GtkWidget name
+            :param search_type: search_type is the type of search
+                                "by_name" to search by the type of GtkWidget
+                                e.g. GtkButton
+                                "by_id" to search by the GtkWidget (glade name)
+                                e.g. box_1
+            :param button_label: button_label to find specific buttons where
+            we cannot use by_id
+            :return: GtkWidget or None
+            """
+            if node is None:
+                return None
+
+            return self.find_many(node, [(search_id, search_type,
+                                          button_label)])[0]
+
+        def find_many(self, node, queries):
+            """
+            find several GTK Widgets in one pass of the widget tree
+            :param node: node is the starting container to find from
+            :param queries: list of (search_id, search_type) or
+            (search_id, search_type, button_label) tuples - see find
+            :return: list of GtkWidget or None in the same order as queries
+            """
+            results = [None] * len(queries)
+
+            if node is None:
+                return results
+
+            missing = {}
+            for pos, query in enumerate(queries):
+                search_id, search_type = query[0], query[1]
+                button_label = query[2] if len(query) > 2 else None
+                key = (node, search_id, search_type, button_label)
+
+                widget = self._index.get(key)
+                if widget is not None and self._still_valid(key, widget):
+                    results[pos] = widget
+                else:
+                    self._index.pop(key, None)
+                    missing.setdefault(key, []).append(pos)
+
+            if not missing:
+                return results
+
+            found = self._walk(node, list(missing))
+            remember = found and not node.is_toplevel()
+
+            for key, positions in missing.items():
+                widget = found.get(key)
+                if widget is not None and remember:
+                    self._index[key] = widget
+                for pos in positions:
+                    results[pos] = widget
+
+            if remember:
+                self._watch(node)
+
+            return results
+
+        def _still_valid(self, key, widget):
+            """
+              an indexed widget is valid while it is inside its root and
+              still matches its search
+            """
+            root = key[0]
+            if widget != root and not widget.is_ancestor(root):
+                return False
+
+            return widget_matches(widget, key[1], key[2], key[3])
+
+        def _walk(self, node, keys):
+            """
+              iterative pre-order walk from node - stops as soon as every
+              key has found its first matching widget
+            """
+            found = {}
+            stack = [node]
+
+            while stack:
+                widget = stack.pop()
+                self.traversed += 1
+
+                for key in keys:
+                    if key not in found and \
+                            widget_matches(widget, key[1], key[2], key[3]):
+                        found[key] = widget
+
+                if len(found) == len(keys):
+                    break
+
+                if isinstance(widget, Gtk.Container):
+                    stack.extend(reversed(widget.get_children()))
+
+            return found
+
+        def _watch(self, root):
+            if root not in self._roots:
+                self._roots[root] = root.connect('destroy', self.forget)
+
+        def forget(self, root):
+            """
+              forget the index entries of searches rooted at root
+            """
+            for key in [key for key in self._index if key[0] == root]:
+                del self._index[key]
+
+            handler_id = self._roots.pop(root, None)
+            if handler_id is not None:
+                root.disconnect(handler_id)
+
+        def clear(self):
+            """
+              forget everything and stop watching widgets
+            """
+            for root, handler_id in self._roots.items():
+                root.disconnect(handler_id)
+
+            self._roots = {}
+            self._index = {}
+
+    def __init__(self):
+        """ Create singleton instance """
+        # Check whether we already have an instance
+        if WidgetFinder.__instance is None:
+            # Create and remember instance
+            WidgetFinder.__instance = WidgetFinder.__impl()
+
+        # Store instance reference as the only member in the handle
+        self.__dict__['_WidgetFinder__instance'] = WidgetFinder.__instance
+
+    def __getattr__(self, attr):
+        """ Delegate access to implementation """
+        return getattr(self.__instance, attr)
+
+    def __setattr__(self, attr, value):
+        """ Delegate access to implementation """
+        return setattr(self.__instance, attr, value)
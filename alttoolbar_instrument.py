@@ -0,0 +1,152 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+import bisect
+import time
+
+from alttoolbar_log import log
+from alttoolbar_preferences import GSetting
+
+
+class Instrumentation:
+    """
+    This class records how often signal handlers and deferred main loop
+    callbacks are called and how long they take. It is switched on by the
+    instrument-handlers gsetting - when switched off handlers are
+    connected unwrapped and cost nothing extra.
+    """
+    # storage for the instance reference
+    __instance = None
+
+    class __impl:
+        """ Implementation of the singleton interface """
+
+        # upper bounds in milliseconds of the latency histogram buckets -
+        # the last bucket collects everything slower
+        BUCKETS = (0.1, 0.5, 1, 2, 4, 8, 16, 33)
+
+        def __init__(self):
+            self.reset()
+
+        def reset(self):
+            """
+            read the instrument-handlers gsetting again and forget what has
+            been recorded - called each time the plugin is activated, before
+            any handler is connected
+            """
+            gs = GSetting()
+            self.enabled = gs.get_value(gs.Path.PLUGIN,
+                                        gs.PluginKey.INSTRUMENT_HANDLERS)
+
+            # name -> [calls, total ms, max ms, histogram]
+            self._stats = {}
+
+        def wrap(self, handler, name=None):
+            """
+            return the handler wrapped so that each call is recorded
+            :param handler: function to be connected to a signal
+            :param name: name to report - by default the handler qualified
+            name
+            """
+            if not self.enabled:
+                return handler
+
+            if name is None:
+                name = getattr(handler, '__qualname__', repr(handler))
+
+            def instrumented(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return handler(*args, **kwargs)
+                finally:
+                    self.record(name, (time.perf_counter() - start) * 1000)
+
+            return instrumented
+
+        def record(self, name, elapsed):
+            """
+            record a call of name that took elapsed milliseconds
+            """
+            if not self.enabled:
+                return
+
+            stat = self._stats.get(name)
+            if stat is None:
+                stat = [0, 0.0, 0.0, [0] * (len(self.BUCKETS) + 1)]
+                self._stats[name] = stat
+
+            stat[0] += 1
+            stat[1] += elapsed
+            stat[2] = max(stat[2], elapsed)
+            stat[3][bisect.bisect_left(self.BUCKETS, elapsed)] += 1
+
+        def report(self):
+            """
+            return the recorded statistics as text - slowest handlers
+            (by total time) first
+            """
+            header = ["<{}".format(bound) for bound in self.BUCKETS]
+            header.append(">={}".format(self.BUCKETS[-1]))
+
+            lines = ["{:<50} {:>7} {:>9} {:>8} {:>8}  {}".format(
+                "handler", "calls", "total ms", "mean ms", "max ms",
+                " ".join("{:>6}".format(h) for h in header))]
+
+            stats = sorted(self._stats.items(), key=lambda item: -item[1][1])
+            for name, (calls, total, longest, histogram) in stats:
+                lines.append(
+                    "{:<50} {:>7} {:>9.2f} {:>8.3f} {:>8.3f}  {}".format(
+                        name, calls, total, total / calls, longest,
+                        " ".join("{:>6}".format(h) for h in histogram)))
+
+            return "\n".join(lines)
+
+        def dump(self, *args):
+            """
+            log the report
+            """
+            if self.enabled:
+                log.warning("handler statistics\n%s", self.report())
+
+    def __init__(self):
+        """ Create singleton instance """
+        # Check whether we already have an instance
+        if Instrumentation.__instance is None:
+            # Create and remember instance
+            Instrumentation.__instance = Instrumentation.__impl()
+
+        # Store instance reference as the only member in the handle
+        self.__dict__['_Instrumentation__instance'] = \
+            Instrumentation.__instance
+
+    def __getattr__(self, attr):
+        """ Delegate access to implementation """
+        return getattr(self.__instance, attr)
+
+    def __setattr__(self, attr, value):
+        """ Delegate access to implementation """
+        return setattr(self.__instance, attr, value)
+
+
+def instrument(handler, name=None):
+    """
+    convenience function - wrap a signal handler, or a callback given to
+    GLib.idle_add and friends, so that its calls are recorded when
+    instrumentation is switched on
+    """
+    return Instrumentation().wrap(handler, name)
@@ -0,0 +1,194 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+from datetime import datetime, date
+from string import Formatter
+
+from gi.repository import GLib
+from gi.repository import Pango
+from gi.repository import RB
+
+# template field name -> RhythmDB property read by EntrySnapshot
+FIELDS = {
+    'title': RB.RhythmDBPropType.TITLE,
+    'artist': RB.RhythmDBPropType.ARTIST,
+    'album': RB.RhythmDBPropType.ALBUM,
+    'genre': RB.RhythmDBPropType.GENRE,
+    'year': RB.RhythmDBPropType.DATE,
+    'stream_title': RB.RHYTHMDB_PROP_STREAM_SONG_TITLE,
+    'stream_artist': RB.RHYTHMDB_PROP_STREAM_SONG_ARTIST,
+}
+
+
+class EntrySnapshot(object):
+    """
+    the markup escaped template fields of an entry - each property is
+    read from the database only when a template first asks for it
+    """
+
+    def __init__(self, db, entry):
+        self._db = db
+        self._entry = entry
+        self._values = {}
+
+    def get(self, field):
+        value = self._values.get(field)
+        if value is None:
+            value = GLib.markup_escape_text(self._read(field) or "")
+            self._values[field] = value
+
+        return value
+
+    def _read(self, field):
+        if field in ('stream_title', 'stream_artist'):
+            return self._db.entry_request_extra_metadata(self._entry,
+                                                         FIELDS[field])
+
+        if field == 'year':
+            year = self._entry.get_ulong(FIELDS[field])
+            if year == 0:
+                return str(date.today().year)
+
+            return str(datetime.fromordinal(year).year)
+
+        return self._entry.get_string(FIELDS[field])
+
+
+class LabelTemplate(object):
+    """
+    a now-playing label template compiled once from a format string such
+    as "<b>{title}</b>\\n<small>{artist} - {album}</small>"
+
+    Each line of the template is rendered separately - a line whose
+    fields are all empty renders as an empty string so that it can be
+    hidden. Field values are markup escaped, the rest of the template is
+    Pango markup.
+    """
+
+    def __init__(self, template):
+        """
+        :param template: `str` format string using the names in FIELDS
+        :raise ValueError: for unknown fields or invalid markup
+        """
+        self._lines = []
+        for line in template.split("\n"):
+            pieces = []
+            for literal, field, spec, conversion in \
+                    Formatter().parse(line):
+                if field is not None and field not in FIELDS:
+                    raise ValueError("unknown label field {%s}" % field)
+                if conversion:
+                    raise ValueError("conversions are not supported")
+                pieces.append((literal, field, spec))
+
+            self._lines.append(pieces)
+
+        try:
+            Pango.parse_markup(template.format(**dict.fromkeys(FIELDS, "")),
+                               -1, "\0")
+        except GLib.Error as e:
+            raise ValueError(e.message)
+
+    def render(self, snapshot):
+        """
+        :param snapshot: EntrySnapshot
+        :return: list of markup strings - one per template line
+        """
+        lines = []
+        for pieces in self._lines:
+            text = []
+            empty = True
+            for literal, field, spec in pieces:
+                text.append(literal)
+                if field is not None:
+                    value = snapshot.get(field)
+                    if value:
+                        empty = False
+                    text.append(format(value, spec) if spec else value)
+
+            # a line made only of literals is always shown
+            if empty and any(field for _, field, _ in pieces):
+                lines.append("")
+            else:
+                lines.append("".join(text))
+
+        return lines
+
+
+# the built-in labels - the first line is the inline title, the rest the
+# inline artist line
+INLINE_TEMPLATES = {
+    'stream': LabelTemplate("<b>{stream_title}</b>\n"
+                            "<small>{stream_artist}</small>"),
+    'no_album': LabelTemplate("<b>{title}</b>\n<small>{artist}</small>"),
+    'album': LabelTemplate("<b>{album}</b>\n<small>{genre} - {year}</small>"),
+    'song': LabelTemplate("<b>{title}</b>\n<small>{artist}</small>"),
+}
+
+# the built-in labels shown above the progress bar
+COMBINED_TEMPLATES = {
+    'stream': LabelTemplate("<small><b>{stream_title}</b> "
+                            "{stream_artist}</small>"),
+    'no_album': LabelTemplate("<small><b>{title}</b></small>"),
+    'album': LabelTemplate("<small>{album} - {genre} - {year}</small>"),
+    'song': LabelTemplate("<small><b>{title}</b> {album} - "
+                          "{artist}</small>"),
+}
+
+
+class TimeLabel(object):
+    """
+    the elapsed / total time label of the playing song. The total half is
+    formatted once per song by set_duration so that each elapsed tick only
+    formats the elapsed half
+    """
+
+    def __init__(self, duration=0):
+        """
+        :param duration: `int` length of the song in seconds
+        """
+        self.set_duration(duration)
+
+    def set_duration(self, duration):
+        """
+        prepare the label format for a song of duration seconds
+        """
+        total_minutes, total_seconds = divmod(duration, 60)
+        total_hours, total_minutes = divmod(total_minutes, 60)
+
+        self._hours = total_hours > 0
+        if self._hours:
+            total = "{}:{:02}:{:02}".format(total_hours, total_minutes,
+                                            total_seconds)
+            self._format = "<small>{}:{:02}:{:02} / " + total + "</small>"
+        else:
+            total = "{:02}:{:02}".format(total_minutes, total_seconds)
+            self._format = "<small>{:02}:{:02} / " + total + "</small>"
+
+    def format(self, seconds):
+        """
+        :param seconds: `int` elapsed time
+        :return: label markup
+        """
+        minutes, seconds = divmod(seconds, 60)
+
+        if self._hours:
+            hours, minutes = divmod(minutes, 60)
+            return self._format.format(hours, minutes, seconds)
+
+        return self._format.format(minutes, seconds)
@@ -0,0 +1,38 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+import logging
+
+# the logger shared by all of the plugin modules - messages below the
+# configured level are discarded before any formatting is done
+log = logging.getLogger('alternative-toolbar')
+
+
+def setup_logging(level_name):
+    """
+    set the level of messages to output
+    :param level_name: `str` one of debug, info, warning, error
+    """
+    log.setLevel(getattr(logging, level_name.upper(), logging.WARNING))
+
+    if not log.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(
+            logging.Formatter('%(name)s %(levelname)s: %(message)s'))
+        log.addHandler(handler)
+        log.propagate = False
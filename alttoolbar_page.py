@@ -0,0 +1,269 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+import weakref
+
+# stands for a widget a realized page was searched for and does not have
+_MISSING = object()
+
+
+class PageRegistry(object):
+    """
+    a dictionary of per-page state that does not keep removed pages alive.
+
+    Pages are held weakly. Pages are also evicted explicitly - see
+    PageRegistries - as soon as they are deleted, because a page can
+    outlive its deletion while a signal emission or a pending idle call
+    still refers to it.
+
+    Values must not refer to their page otherwise the page can never be
+    freed.
+    """
+
+    # attribute set on each registered page - a python wrapper with
+    # attributes of its own stays alive for as long as the GObject does so
+    # the weak reference is not lost while the page is still in use
+    MARKER = '_alttoolbar_registered'
+
+    def __init__(self, on_register=None):
+        """
+        :param on_register: function called with each page the first time
+        it is registered
+        """
+        self._items = weakref.WeakKeyDictionary()
+        self._on_register = on_register
+
+    def __contains__(self, page):
+        return page in self._items
+
+    def __getitem__(self, page):
+        return self._items[page]
+
+    def __setitem__(self, page, value):
+        if page not in self._items:
+            setattr(page, self.MARKER, True)
+            if self._on_register:
+                self._on_register(page)
+
+        self._items[page] = value
+
+    def __iter__(self):
+        return iter(list(self._items.keys()))
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, page, default=None):
+        return self._items.get(page, default)
+
+    def items(self):
+        return list(self._items.items())
+
+    def clear(self):
+        """
+        forget every page
+        """
+        self._items.clear()
+
+    def evict(self, page):
+        """
+        forget the page
+        :return: the value held for the page or None
+        """
+        return self._items.pop(page, None)
+
+
+class PageRegistries(object):
+    """
+    the per-page registries of a toolbar. Each page registered in any of
+    them is watched for its 'deleted' signal and then evicted from all of
+    them - pages that are merely hidden stay registered.
+    """
+
+    def __init__(self, on_deleted=None):
+        """
+        :param on_deleted: function called with a deleted page before it is
+        evicted
+        """
+        self._registries = []
+        self._on_deleted = on_deleted
+        # page -> 'deleted' signal handler id
+        self._deleted_ids = PageRegistry()
+
+    def new_registry(self):
+        """
+        :return: a new PageRegistry whose pages are evicted once deleted
+        """
+        registry = PageRegistry(self._watch)
+        self._registries.append(registry)
+
+        return registry
+
+    def _watch(self, page):
+        if page not in self._deleted_ids:
+            self._deleted_ids[page] = page.connect('deleted',
+                                                   self._page_deleted)
+
+    def _page_deleted(self, page):
+        if self._on_deleted:
+            self._on_deleted(page)
+
+        self.evict(page)
+
+    def evict(self, page):
+        """
+        forget the page in every registry and stop watching it
+        """
+        for registry in self._registries:
+            registry.evict(page)
+
+        handler_id = self._deleted_ids.evict(page)
+        if handler_id is not None:
+            page.disconnect(handler_id)
+
+    def cleanup(self):
+        """
+        stop watching every page
+        """
+        for page, handler_id in self._deleted_ids.items():
+            page.disconnect(handler_id)
+
+        self._deleted_ids.clear()
+
+
+class PageAnatomy(object):
+    """
+    the widgets inside an RBDisplayPage that the toolbars work with.
+    Found with one walk of the page the first time the page is shown and
+    then reused every time the page is selected again. A widget not found
+    while the page is still unrealized - for example because the page had
+    not finished building itself - is looked for again each time it is
+    asked for. Once a realized page has been searched the widgets it does
+    not have are remembered as missing until invalidate is called.
+
+    The record only holds a weak reference to the page so it can be held
+    in a weak dictionary keyed by the page.
+    """
+
+    # widget attribute -> find query
+    QUERIES = (('propertyview', ('RBPropertyView', 'by_name')),
+               ('source_toolbar', ('RBSourceToolbar', 'by_name')),
+               ('grid', ('GtkGrid', 'by_name')))
+
+    def __init__(self, page, find, find_many):
+        """
+        :param page: RBDisplayPage
+        :param find: function - see AltToolbarPlugin.find
+        :param find_many: function - see AltToolbarPlugin.find_many
+        """
+        self._page = weakref.ref(page)
+        self._find = find
+
+        found = find_many(page, [query for _, query in self.QUERIES])
+        self._widgets = dict((attr, widget) for (attr, _), widget in
+                             zip(self.QUERIES, found))
+        self._remember_missing(page)
+        self._entryview = None
+        self._treeview = None
+
+        # per-page work already done by the toolbars - so that selecting
+        # the page again can skip it
+        self.categories_reset = False
+
+        # ColumnStore.get_layout of the columns last applied to the entry
+        # view - pages of the same type share a layout so it can change
+        # while this page is not shown
+        self.applied_layout = None
+
+        # (title, width) of each titled entry view column when last
+        # allocated
+        self.columns = None
+
+        # source id of the column moves waiting to be made
+        self.move_id = None
+
+    def _remember_missing(self, page):
+        if not page.get_realized():
+            return
+
+        for attr, widget in self._widgets.items():
+            if widget is None:
+                self._widgets[attr] = _MISSING
+
+    def _widget(self, attr):
+        widget = self._widgets[attr]
+        if widget is _MISSING:
+            return None
+
+        page = self._page()
+        if widget is None and page is not None:
+            widget = self._find(page, *dict(self.QUERIES)[attr])
+            self._widgets[attr] = widget
+            if widget is None:
+                self._remember_missing(page)
+
+        return widget
+
+    def invalidate(self):
+        """
+        look again for the widgets remembered as missing - for when
+        widgets are added to a page after it was realized
+        """
+        for attr, widget in self._widgets.items():
+            if widget is _MISSING:
+                self._widgets[attr] = None
+
+    @property
+    def propertyview(self):
+        return self._widget('propertyview')
+
+    @property
+    def source_toolbar(self):
+        return self._widget('source_toolbar')
+
+    @property
+    def grid(self):
+        return self._widget('grid')
+
+    @property
+    def entryview(self):
+        page = self._page()
+        if self._entryview is None and page is not None:
+            try:
+                self._entryview = page.get_entry_view()
+            except:
+                # some pages dont have the method to call!
+                pass
+
+        return self._entryview
+
+    @property
+    def treeview(self):
+        entryview = self.entryview
+        if self._treeview is None and entryview:
+            try:
+                self._treeview = entryview.get_child()
+            except:
+                # in RB v3.4.3 an RBEntryView doesnt have a child property...
+                # plus the GtkTreeview is now hidden inside two further
+                # containers - so we grab the tree view the hard-way of
+                # searching for the Object Type
+                self._treeview = self._find(entryview, 'GtkTreeView',
+                                            'by_name')
+
+        return self._treeview
@@ -20,6 +20,7 @@ import gettext
 import re
 import webbrowser
 
+from alttoolbar_log import log
 from alttoolbar_preferences import CoverLocale
 from gi.repository import GLib
 from gi.repository import Gio
@@ -98,8 +99,8 @@ class PluginListRow(Gtk.ListBoxRow):
         self._refresh = True
 
         def delay(*args):
-            print("switch_changed")
-            print(switch.get_active())
+            log.debug("switch_changed")
+            log.debug("%s", switch.get_active())
             self._switch_callback(switch, self.plugin)
 
             self._refresh = False
@@ -260,7 +261,7 @@ class PluginDialog(Gtk.Dialog):
 
     def _on_load_unload_plugin(self, engine, plugin):
         module_name = plugin.get_module_name()
-        print(module_name)
+        log.debug("%s", module_name)
 
         if module_name in self._items:
             self._items[module_name].refresh()
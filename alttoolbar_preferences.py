@@ -26,6 +26,7 @@ import sys
 
 import gi
 import rb
+from alttoolbar_log import log
 from gi.repository import GObject
 from gi.repository import Gio
 from gi.repository import Gtk
@@ -70,7 +71,12 @@ class GSetting:
                 SOURCE_TOOLBAR='show-source-toolbar',
                 HORIZ_CATEGORIES='horiz-categories',
                 APP_MENU='app-menu-display',
-                DARK_THEME='dark-theme'
+                DARK_THEME='dark-theme',
+                SEEK_ON_RELEASE='seek-on-release',
+                SEEK_INTERVAL='seek-interval',
+                INSTRUMENT_HANDLERS='instrument-handlers',
+                LOG_LEVEL='log-level',
+                LABEL_TEMPLATE='label-template'
             )
 
             self.setting = {}
@@ -215,7 +221,7 @@ class Preferences(GObject.Object, PeasGtk.Configurable):
         """
         Creates the plugin's preferences dialog
         """
-        print("DEBUG - create_display_contents")
+        log.debug("create_display_contents")
         # create the ui
         self._first_run = True
 
@@ -17,6 +17,8 @@
 # MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
 # GNU General Public License for more details.
 
+from alttoolbar_instrument import instrument
+from alttoolbar_log import log
 from alttoolbar_preferences import CoverLocale
 from alttoolbar_preferences import GSetting
 from gi.repository import GLib
@@ -51,8 +53,8 @@ class Repeat(GObject.Object):
         # EOS signal means that the song changed because the song is over.
         # ie. the user did not manually change the song.
         # https://developer.gnome.org/rhythmbox/unstable/RBPlayer.html#RBPlayer-eos
-        player.props.player.connect('eos', self.on_gst_player_eos)
-        player.connect('playing-song-changed', self.on_song_change)
+        player.props.player.connect('eos', instrument(self.on_gst_player_eos))
+        player.connect('playing-song-changed', instrument(self.on_song_change))
         # This hack is no longer needed when the above signal handlers
         # work. For more details, refer to the comments above the
         # definition of method on_elapsed_change.
@@ -69,8 +71,10 @@ class Repeat(GObject.Object):
             repeat = RepeatPopContainer(popover, toggle_button)
             popover.add(repeat)
 
-        toggle_button.connect('toggled', self._on_toggle, popover, repeat)
-        repeat.connect('repeat-type-changed', self._on_repeat_type_changed)
+        toggle_button.connect('toggled', instrument(self._on_toggle), popover,
+                              repeat)
+        repeat.connect('repeat-type-changed',
+                       instrument(self._on_repeat_type_changed))
 
         self._on_repeat_type_changed(repeat, repeat.get_repeat_type())
 
@@ -85,7 +89,7 @@ class Repeat(GObject.Object):
 
         self._set_toggle_tooltip(repeat)
 
-        print("on toggle", self.repeat_song)
+        log.debug("on toggle %s", self.repeat_song)
 
     def _set_toggle_tooltip(self, repeat):
         # locale stuff
@@ -111,7 +115,7 @@ class Repeat(GObject.Object):
 
         self._set_toggle_tooltip(repeat)
 
-        print("repeat type changed", self.repeat_song)
+        log.debug("repeat type changed %s", self.repeat_song)
 
     def on_gst_player_eos(self, gst_player, stream_data, early=0):
         """
@@ -181,9 +185,11 @@ class RepeatPopContainer(Gtk.ButtonBox):
         image.set_from_gicon(icon, icon_size)
         image.props.margin = 5
         toggle1.set_image(image)
-        toggle1.connect('leave-notify-event', self._on_popover_mouse_over)
-        toggle1.connect('enter-notify-event', self._on_popover_mouse_over)
-        toggle1.connect('toggled', self._on_popover_button_toggled)
+        toggle1.connect('leave-notify-event',
+                        instrument(self._on_popover_mouse_over))
+        toggle1.connect('enter-notify-event',
+                        instrument(self._on_popover_mouse_over))
+        toggle1.connect('toggled', instrument(self._on_popover_button_toggled))
 
         # locale stuff
         cl = CoverLocale()
@@ -217,9 +223,11 @@ class RepeatPopContainer(Gtk.ButtonBox):
         self._repeat_song_image.set_from_gicon(icon2, icon_size)
         self._repeat_song_image.props.margin = 5
 
-        toggle2.connect('leave-notify-event', self._on_popover_mouse_over)
-        toggle2.connect('enter-notify-event', self._on_popover_mouse_over)
-        toggle2.connect('toggled', self._on_popover_button_toggled)
+        toggle2.connect('leave-notify-event',
+                        instrument(self._on_popover_mouse_over))
+        toggle2.connect('enter-notify-event',
+                        instrument(self._on_popover_mouse_over))
+        toggle2.connect('toggled', instrument(self._on_popover_button_toggled))
         toggle2.show_all()
         self._repeat_song_button = toggle2
         self.add(toggle2)
@@ -227,13 +235,13 @@ class RepeatPopContainer(Gtk.ButtonBox):
 
         self._popover_inprogress = 0
         parent_container.connect('leave-notify-event',
-                                 self._on_popover_mouse_over)
+                                 instrument(self._on_popover_mouse_over))
         parent_container.connect('enter-notify-event',
-                                 self._on_popover_mouse_over)
+                                 instrument(self._on_popover_mouse_over))
         parent_button.connect('leave-notify-event',
-                              self._on_popover_mouse_over)
+                              instrument(self._on_popover_mouse_over))
         parent_button.connect('enter-notify-event',
-                              self._on_popover_mouse_over)
+                              instrument(self._on_popover_mouse_over))
 
         parent_button.set_image(self._repeat_image)
 
@@ -251,7 +259,7 @@ class RepeatPopContainer(Gtk.ButtonBox):
             self._repeat_song_button.set_active(True)
 
     def _on_popover_button_toggled(self, button, *args):
-        print("popover toggle")
+        log.debug("popover toggle")
         if button.get_active():
             if button == self._repeat_button:
                 self._parent_button.set_image(self._repeat_image)
@@ -275,19 +283,19 @@ class RepeatPopContainer(Gtk.ButtonBox):
         if eventcrossing.type == Gdk.EventType.ENTER_NOTIFY:
             if self._popover_inprogress == 0:
                 self._popover_inprogress = 1
-                print("enter1")
+                log.debug("enter1")
             else:
                 self._popover_inprogress = 2
-                print("enter2")
+                log.debug("enter2")
             self._popover_inprogress_count = 0
 
             if type(widget) is Gtk.ToggleButton:
-                print("here")
+                log.debug("here")
                 if widget.get_active():
-                    print(self._parent_container)
+                    log.debug("%s", self._parent_container)
                     self._parent_container.show_all()
         else:
-            print("exit")
+            log.debug("exit")
             self._popover_inprogress = 3
 
         def delayed(*args):
@@ -299,13 +307,13 @@ class RepeatPopContainer(Gtk.ButtonBox):
 
                 self._parent_container.hide()
                 self._popover_inprogress = 0
-                print("exit timeout")
+                log.debug("exit timeout")
                 return False
             else:
                 return True
 
         if self._popover_inprogress == 1:
-            print("adding timeout")
+            log.debug("adding timeout")
             self._popover_inprogress = 2
             GLib.timeout_add(100, delayed)
 
@@ -320,9 +328,9 @@ class CustomPopover(Gtk.Window):
         self.set_type_hint(Gdk.WindowTypeHint.DOCK)
         self.stick()
         self._parent_button = parent_button
-        self.connect_after('show', self._on_show)
+        self.connect_after('show', instrument(self._on_show))
         # Track movements of the window to move calendar window as well
-        self.connect("configure-event", self.on_window_config)
+        self.connect("configure-event", instrument(self.on_window_config))
 
     def add(self, widget):
         self._frame = Gtk.Frame()
@@ -385,7 +393,7 @@ class CustomPopover(Gtk.Window):
         delta_y = screen_h - (y + rect.height)
         if delta_x < 0:
             corrected_x += delta_x
-            print("at x")
+            log.debug("at x")
         if corrected_x < 0:
             corrected_x = 0
 
@@ -398,7 +406,7 @@ class CustomPopover(Gtk.Window):
         if delta_y < 0 or (calc < 0):
             btn_hgt = self._parent_button.get_allocation().height
             corrected_y = y - rect.height - btn_hgt
-            print("at y")
+            log.debug("at y")
         if corrected_y < 0:
             corrected_y = 0
         return [corrected_x, corrected_y]
@@ -19,6 +19,8 @@
 import gettext
 
 from alttoolbar_controller import AltControllerCategory
+from alttoolbar_instrument import instrument
+from alttoolbar_log import log
 from alttoolbar_preferences import CoverLocale
 from alttoolbar_preferences import GSetting
 from gi.repository import GLib
@@ -46,6 +48,7 @@ class AltToolbarSidebar(Gtk.TreeView):
 
         self._drag_dest_source = None
         self._drag_motion_counter = -1
+        self._redraw_pending = False
 
         # locale stuff
         cl = CoverLocale()
@@ -53,6 +56,21 @@ class AltToolbarSidebar(Gtk.TreeView):
 
         self.set_name("AltToolbarSideBar")
         self._category = {}
+        # source -> (TreeRowReference of its treestore row,
+        #            TreeRowReference of its display_page_model row,
+        #            list of source signal handler ids)
+        self._rows = {}
+        # display_page_model path when indexed -> source - paths shift as
+        # rows come and go so a source found here is checked against its
+        # row reference
+        self._model_paths = {}
+        # source -> icon shown for the source
+        self._gicons = {}
+        # source name -> translated name for the language in
+        # _translations_language
+        self._translations = {}
+        self._translations_language = None
+        self._catalog = None
         self._last_click_source = None
 
         self._user_clicked = False
@@ -99,10 +117,10 @@ class AltToolbarSidebar(Gtk.TreeView):
             # previous session
             expanders = eval(self.expanders)
 
-            print(expanders)
-            print(self.expanders)
+            log.debug("%s", expanders)
+            log.debug("%s", self.expanders)
             for category in expanders:
-                print(category)
+                log.debug("%s", category)
                 path = self.treestore.get_path(self._category[category])
 
                 if path and expanders[category]:
@@ -123,7 +141,7 @@ class AltToolbarSidebar(Gtk.TreeView):
         pixbuf_renderer = Gtk.CellRendererPixbuf()
         column.pack_start(pixbuf_renderer, False)
         renderer = Gtk.CellRendererText()
-        renderer.connect('edited', self.on_renderertext_edited)
+        renderer.connect('edited', instrument(self.on_renderertext_edited))
         self.text_renderer = renderer
         column.pack_start(renderer, False)
 
@@ -143,42 +161,125 @@ class AltToolbarSidebar(Gtk.TreeView):
     def _connect_signals(self):
         # display_page_model signals to keep the sidebar model in sync
         model = self.shell.props.display_page_model
-        self._cpi = model.connect('page-inserted', self._model_page_inserted)
-        self._crd = model.connect('row-deleted', self._model_page_deleted)
+        self._cpi = model.connect('page-inserted',
+                                  instrument(self._model_page_inserted))
+        self._crd = model.connect('row-deleted',
+                                  instrument(self._model_page_deleted))
         # self._crc = model.connect('row-changed', self._model_page_changed)
 
         # when we click on the sidebar -
         # need to keep the display_page_tree in sync
-        self.connect('button-press-event', self._row_click)
+        self.connect('button-press-event', instrument(self._row_click))
         # and visa versa
         tree = self.shell.props.display_page_tree
-        tree.props.model.connect('row-inserted', self._tree_inserted)
+        tree.props.model.connect('row-inserted',
+                                 instrument(self._tree_inserted))
 
         tree.connect('selected',
-                     self._display_page_tree_selected)
-        self.shell.props.shell_player.connect('playing-song-changed',
-                                              self._on_playing_song_changed)
+                     instrument(self._display_page_tree_selected))
+        self.shell.props.shell_player.connect(
+            'playing-song-changed', instrument(self._on_playing_song_changed))
+        # catch up with any redraw skipped whilst we could not be seen
+        self.connect('map', instrument(self._on_visible))
+        self._iconified_id = self.toolbar.connect(
+            'notify::window-iconified', instrument(self._on_visible))
 
         # drag drop
         self.enable_model_drag_dest([], Gdk.DragAction.COPY)
         self.drag_dest_add_uri_targets()
-        self.connect('drag-drop', self.on_drag_drop)
+        self.connect('drag-drop', instrument(self.on_drag_drop))
         self.connect('drag-data-received',
-                     self.on_drag_data_received)
-        self.connect('drag-motion', self.on_drag_motion)
+                     instrument(self.on_drag_data_received))
+        self.connect('drag-motion', instrument(self.on_drag_motion))
 
     def cleanup(self):
         model = self.shell.props.display_page_model
         model.disconnect(self._cpi)
         model.disconnect(self._crd)
         # model.disconnect(self._crc)
+        self.toolbar.disconnect(self._iconified_id)
+
+        for source in list(self._rows):
+            self._forget(source)
+
+    def _add_row(self, parent_iter, source, model, page_iter):
+        """
+          append a row for source to the treestore and index it
+          :param model: the display_page_model
+          :param page_iter: iter of the source in the display_page_model
+          :return: treestore iter of the new row
+        """
+        self._forget(source)
+
+        leaf_iter = self.treestore.append(parent_iter)
+        self.treestore[leaf_iter] = ["", source, True]
+
+        model_path = model.get_path(page_iter)
+        model_row = Gtk.TreeRowReference.new(model, model_path)
+        self._model_paths[str(model_path)] = source
+
+        row = Gtk.TreeRowReference.new(self.treestore,
+                                       self.treestore.get_path(leaf_iter))
+        ids = [source.connect('deleted',
+                              instrument(self._on_source_deleted)),
+               source.connect('notify::name',
+                              instrument(self._on_source_renamed))]
+        self._rows[source] = (row, model_row, ids)
+
+        return leaf_iter
+
+    def _row_iter(self, source):
+        """
+          :return: treestore iter of the row showing source or None
+        """
+        indexed = self._rows.get(source)
+        if indexed is None or not indexed[0].valid():
+            return None
+
+        return self.treestore.get_iter(indexed[0].get_path())
+
+    def _remove_row(self, source):
+        """
+          remove the row of source and its children from the treestore and
+          the index
+        """
+        treeiter = self._row_iter(source)
+        if treeiter is None:
+            return
+
+        def forget(treeiter):
+            while treeiter is not None:
+                self._forget(self.treestore[treeiter][1])
+
+                forget(self.treestore.iter_children(treeiter))
+                treeiter = self.treestore.iter_next(treeiter)
+
+        forget(self.treestore.iter_children(treeiter))
+        self._forget(source)
+
+        self.treestore.remove(treeiter)
+
+    def _forget(self, source):
+        """
+          drop source from the row index and the icon cache
+        """
+        self._gicons.pop(source, None)
+
+        indexed = self._rows.pop(source, None)
+        if indexed:
+            for handler_id in indexed[2]:
+                source.disconnect(handler_id)
+
+    def _on_source_renamed(self, source, param):
+        # some icons depend on the name of the source
+        self._gicons.pop(source, None)
 
     def on_drag_drop(self, widget, context, x, y, time):
         """
         Callback called when a drag operation finishes over the treeview
         It decides if the dropped item can be processed.
         """
-        print("on_drag_drop")
+        log.debug("on_drag_drop")
         # stop the propagation of the signal (deactivates superclass callback)
         widget.stop_emission_by_name('drag-drop')
 
@@ -263,7 +364,7 @@ class AltToolbarSidebar(Gtk.TreeView):
         Callback called when the drag source has prepared the data (pixbuf)
         for us to use.
         """
-        print("on_drag_data_received")
+        log.debug("on_drag_data_received")
         # stop the propagation of the signal (deactivates superclass callback)
         widget.stop_emission_by_name('drag-data-received')
 
@@ -289,19 +390,34 @@ class AltToolbarSidebar(Gtk.TreeView):
         :param args:
         :return:
         """
-        print("playing song changed")
+        log.debug("playing song changed")
+        if not self.get_mapped() or self.toolbar.window_iconified:
+            self._redraw_pending = True
+            return
+
         if hasattr(self.plugin, "db"):  # curious crash when exiting - lets not
             # send the queue_draw in this case
-            print("queuing")
+            log.debug("queuing")
             self.queue_draw()
 
+    def _on_visible(self, *args):
+        """
+          the sidebar has been mapped or the window iconify state changed
+        """
+        if self._redraw_pending and self.get_mapped() and \
+                not self.toolbar.window_iconified:
+            self._redraw_pending = False
+            self._on_playing_song_changed()
+
     def on_renderertext_edited(self, renderer, path, new_text):
-        print("edited")
+        log.debug("edited")
 
-        print(path)
-        print(new_text)
+        log.debug("%s", path)
+        log.debug("%s", new_text)
 
-        self.treestore_filter[path][1].props.name = new_text
+        source = self.treestore_filter[path][1]
+        self._translations.pop(source.props.name, None)
+        source.props.name = new_text
 
     def _traverse_rows(self, store, treeiter, new_parent_iter, depth):
         while treeiter is not None:
@@ -316,13 +432,11 @@ class AltToolbarSidebar(Gtk.TreeView):
 
             if depth == 0:
                 category_iter = self._get_category_iter(store[treeiter][1])
-                leaf_iter = self.treestore.append(category_iter)
+                leaf_iter = self._add_row(category_iter, store[treeiter][1],
+                                          store, treeiter)
             else:
-                leaf_iter = self.treestore.append(new_parent_iter)
-
-            self.treestore[leaf_iter][1] = store[treeiter][1]
-            self.treestore[leaf_iter][0] = ""
-            self.treestore[leaf_iter][2] = True
+                leaf_iter = self._add_row(new_parent_iter,
+                                          store[treeiter][1], store, treeiter)
 
             if store.iter_has_child(treeiter):
                 childiter = store.iter_children(treeiter)
@@ -335,44 +449,22 @@ class AltToolbarSidebar(Gtk.TreeView):
     #    # self._model_page_inserted(model, path, page_iter)
 
     def _tree_inserted(self, model, path, page_iter):
-        print(path)
-        print(page_iter)
-        print(model[path][1].props.name)
-        print(model[path][1])
+        log.debug("%s", path)
+        log.debug("%s", page_iter)
+        log.debug("%s", model[path][1].props.name)
+        log.debug("%s", model[path][1])
         self._model_page_inserted(model, model[path][1], page_iter)
 
     def _model_page_inserted(self, model, page, page_iter):
         if page and not page.props.visibility:
             return  # we don't display sources that are marked as hidden
-        print(page)
-        print(page_iter)
+        log.debug("%s", page)
+        log.debug("%s", page_iter)
         parent_iter = model.iter_parent(page_iter)
-        print(parent_iter)
-
-        def find_lookup_rows(store, treeiter, page):
-            while treeiter is not None:
-
-                found_page = store[treeiter][1]
-                print(found_page)
-                if found_page is not None and found_page == page:
-                    # print("found %s" % found_page.props.name)
-                    return treeiter
-
-                if store.iter_has_child(treeiter):
-                    childiter = store.iter_children(treeiter)
-                    ret = find_lookup_rows(store, childiter, page)
-
-                    if ret:
-                        return ret
-
-                treeiter = store.iter_next(treeiter)
-
-            print("nothing found")
-            return None
+        log.debug("%s", parent_iter)
 
         # first check if we've already got the page in the model
-        rootiter = self.treestore.get_iter_first()
-        if find_lookup_rows(self.treestore, rootiter, page):
+        if self._row_iter(page) is not None:
             return
 
         if (parent_iter and isinstance(model[parent_iter][1],
@@ -382,20 +474,14 @@ class AltToolbarSidebar(Gtk.TreeView):
             # display-page-model
             # print("top level")
             category_iter = self._get_category_iter(page)
-            leaf_iter = self.treestore.append(category_iter)
+            leaf_iter = self._add_row(category_iter, page, model, page_iter)
         else:
             # the parent is another source so we need to find the iter in our
             # model to hang it off
             # print("child level")
             searchpage = model[parent_iter][1]
-            # print("####", searchpage)
-            leaf_iter = find_lookup_rows(self.treestore, rootiter, searchpage)
-            # print("##2", leaf_iter)
-            leaf_iter = self.treestore.append(leaf_iter)
-
-        self.treestore[leaf_iter][1] = page
-        self.treestore[leaf_iter][0] = ""
-        self.treestore[leaf_iter][2] = True
+            leaf_iter = self._add_row(self._row_iter(searchpage), page,
+                                      model, page_iter)
 
         self._refresh_headers()
 
@@ -412,11 +498,11 @@ class AltToolbarSidebar(Gtk.TreeView):
         :param leaf_iter: treestore iter
         :return:
         """
-        print("edit_playlist")
+        log.debug("edit_playlist")
         self.text_renderer.props.editable = True
         path = self.treestore.get_path(leaf_iter)
         path = self.treestore_filter.convert_child_path_to_path(path)
-        print(path)
+        log.debug("%s", path)
         self.grab_focus()
 
         def delayed(*args):
@@ -425,72 +511,73 @@ class AltToolbarSidebar(Gtk.TreeView):
 
         GLib.timeout_add_seconds(1, delayed, None)
 
+    def _on_source_deleted(self, source):
+        """
+          signal from a source that is being deleted - remove it and its
+          children from our tree
+        """
+        self._remove_row(source)
+        self._refresh_headers()
+
     def _model_page_deleted(self, model, path):
         """
-          signal from the displaytreemodel - we dont actually know what is
-          deleted ... just that something has been
+          signal from the displaytreemodel - a row has gone. Sources that are
+          deleted have already been removed by _on_source_deleted, this
+          catches pages that are just hidden - their display_page_model row
+          reference is no longer valid. The source indexed at path is
+          looked up first, every row is only checked once paths have
+          shifted since the rows were indexed
         :param model:
         :param path:
         :return:
         """
+        source = self._model_paths.pop(str(path), None)
+        indexed = self._rows.get(source)
+        if indexed is not None and not indexed[1].valid():
+            removed = [source]
+        else:
+            removed = self._reindex_model_paths()
 
-        # first do a reverse lookup so that we can search quicker later
-        # dict of sources in the sidebar model with their treeiter
-        lookup = {}
-        rootiter = self.treestore.get_iter_first()
-
-        def find_lookup_rows(store, treeiter):
-            while treeiter is not None:
-                # if store[treeiter][0] == "":
-                #    lookup[store[treeiter][1]] = treeiter
-
-                if store[treeiter][1] is not None:
-                    lookup[store[treeiter][1]] = treeiter
-
-                if store.iter_has_child(treeiter):
-                    childiter = store.iter_children(treeiter)
-                    find_lookup_rows(store, childiter)
-                treeiter = store.iter_next(treeiter)
-
-        find_lookup_rows(self.treestore, rootiter)
-
-        # next iterate through the displaytreemodel - where we have a matching
-        # source, delete it from our lookup
-        def find_rows(store, treeiter):
-            while treeiter is not None:
-                if store[treeiter][1] in lookup:
-                    del lookup[store[treeiter][1]]
+        if not removed:
+            return
 
-                if store.iter_has_child(treeiter):
-                    childiter = store.iter_children(treeiter)
-                    find_rows(store, childiter)
-                treeiter = store.iter_next(treeiter)
+        for source in removed:
+            # a parent may already have taken its children with it
+            if source in self._rows:
+                self._remove_row(source)
 
-        rootiter = model.get_iter_first()
-        find_rows(model, rootiter)
+        self._refresh_headers()
 
-        # from what is left is the stuff to remove from our treeview
-        # (treestore)
-        for source in lookup:
-            self.treestore.remove(lookup[source])
+    def _reindex_model_paths(self):
+        """
+          index every source again by its current display_page_model path
+          :return: list of sources whose display_page_model row has gone
+        """
+        self._model_paths = {}
+        removed = []
+        for source, (row, model_row, ids) in self._rows.items():
+            if model_row.valid():
+                self._model_paths[str(model_row.get_path())] = source
+            else:
+                removed.append(source)
 
-        self._refresh_headers()
+        return removed
 
     def _row_click(self, widget, event):
         """
         event called when clicking on a row
         """
-        print('_row_click')
+        log.debug("_row_click")
 
         try:
             treepath, treecolumn, cellx, celly = \
                 widget.get_path_at_pos(event.x, event.y)
         except:
-            print("exit")
+            log.debug("exit")
             return
 
         active_object = self.treestore_filter[treepath][1]
-        print(active_object)
+        log.debug("%s", active_object)
 
         if active_object:
             # we have a source
@@ -513,7 +600,7 @@ class AltToolbarSidebar(Gtk.TreeView):
                     cat_vals[category] = self.row_expanded(path)
 
             self.expanders = str(cat_vals)
-            print(self.expanders)
+            log.debug("%s", self.expanders)
 
         GLib.timeout_add_seconds(1, delayed)
 
@@ -530,27 +617,13 @@ class AltToolbarSidebar(Gtk.TreeView):
             self._user_clicked = False
             return
 
-        # first do a reverse lookup so that we can search quicker later
-        # dict of sources in the sidebar model with their treeiter
-        lookup = {}
-        rootiter = self.treestore_filter.get_iter_first()
-
-        def find_lookup_rows(store, treeiter):
-            while treeiter is not None:
-
-                if store[treeiter][1] is not None:
-                    lookup[store[treeiter][1]] = treeiter
-                    print(store[treeiter][1].props.name)
-
-                if store.iter_has_child(treeiter):
-                    childiter = store.iter_children(treeiter)
-                    find_lookup_rows(store, childiter)
-                treeiter = store.iter_next(treeiter)
-
-        find_lookup_rows(self.treestore_filter, rootiter)
+        treeiter = self._row_iter(page)
+        if treeiter is None:
+            return
 
-        if page in lookup:
-            path = self.treestore_filter.get_path(lookup[page])
+        path = self.treestore_filter.convert_child_path_to_path(
+            self.treestore.get_path(treeiter))
+        if path is not None:
             self.expand_to_path(path)
             self.set_cursor(path)
 
@@ -564,7 +637,6 @@ class AltToolbarSidebar(Gtk.TreeView):
         if source is None:
             renderer.props.weight = Pango.Weight.BOLD
             renderer.props.text = model[treeiter][0]
-            print(renderer.props.text)
             renderer.props.visible = model[treeiter][2]
         else:
             renderer.props.visible = True
@@ -573,11 +645,7 @@ class AltToolbarSidebar(Gtk.TreeView):
                 player.get_playing and player.get_playing_source() == source
 
             if (source.props.name):
-                cl = CoverLocale()
-                cl.switch_locale(cl.Locale.LOCALE_DOMAIN)
-                translation = gettext.gettext(source.props.name)
-                cl.switch_locale(cl.Locale.RB)
-                renderer.props.text = translation
+                renderer.props.text = self._translate(source.props.name)
             else:
                 renderer.props.text = ""
             if playing:
@@ -597,6 +665,27 @@ class AltToolbarSidebar(Gtk.TreeView):
 
         renderer.props.ellipsize = Pango.EllipsizeMode.END
 
+    def _translate(self, name):
+        """
+          the translation of a source name - looked up in the plugin
+          catalog once per name rather than switching the process locale
+          for every row drawn
+        """
+        language = GLib.get_language_names()[0]
+        if language != self._translations_language:
+            self._translations_language = language
+            self._translations = {}
+            self._catalog = gettext.translation(
+                CoverLocale().Locale.LOCALE_DOMAIN, RB.locale_dir(),
+                fallback=True)
+
+        translation = self._translations.get(name)
+        if translation is None:
+            translation = self._catalog.gettext(name)
+            self._translations[name] = translation
+
+        return translation
+
     def _refresh_headers(self):
         treeiter = self.treestore.get_iter_first()
 
@@ -611,9 +700,14 @@ class AltToolbarSidebar(Gtk.TreeView):
         if source is None:
             renderer.props.pixbuf = None
         else:
-            ret_bool, controller = self.toolbar.is_controlled(source)
-
-            renderer.props.gicon = controller.get_gicon(source)
+            gicon = self._gicons.get(source)
+            if gicon is None:
+                ret_bool, controller = self.toolbar.is_controlled(source)
+                gicon = controller.get_gicon(source)
+                if source in self._rows:
+                    self._gicons[source] = gicon
+
+            renderer.props.gicon = gicon
             renderer.props.follow_state = True
 
         path = model.get_path(treeiter)
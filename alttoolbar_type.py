@@ -17,9 +17,7 @@
 # Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
 
 import os
-import xml.etree.ElementTree as ET
-from datetime import datetime, date
-from xml.etree.ElementTree import SubElement
+import time
 
 import rb
 from alttoolbar_controller import AltAndroidController
@@ -36,6 +34,19 @@ from alttoolbar_controller import AltRadioController
 from alttoolbar_controller import AltSoundCloudController
 from alttoolbar_controller import AltStandardLocalController
 from alttoolbar_controller import AltStandardOnlineController
+from alttoolbar_coverart import CoverArtCache
+from alttoolbar_entryview import ColumnStore
+from alttoolbar_entryview import plan_column_moves
+from alttoolbar_entryview import safe_string
+from alttoolbar_instrument import Instrumentation
+from alttoolbar_instrument import instrument
+from alttoolbar_label import COMBINED_TEMPLATES
+from alttoolbar_label import EntrySnapshot
+from alttoolbar_label import INLINE_TEMPLATES
+from alttoolbar_label import LabelTemplate
+from alttoolbar_log import log
+from alttoolbar_page import PageAnatomy
+from alttoolbar_page import PageRegistries
 from alttoolbar_preferences import CoverLocale
 from alttoolbar_preferences import GSetting
 from alttoolbar_rb3compat import gtk_version
@@ -77,6 +88,11 @@ class AltToolbarBase(GObject.Object):
     # if changed to true then
     # setup_completed observers called back
     source_toolbar_visible = GObject.property(type=bool, default=True)
+    # suspended is true whilst the play-controls cannot be seen - either
+    # hidden or the window is minimised - per-tick and per-song updates of
+    # the play-controls should not be done whilst suspended
+    suspended = GObject.property(type=bool, default=False)
+    window_iconified = GObject.property(type=bool, default=False)
 
     def __init__(self):
         """
@@ -84,42 +100,22 @@ class AltToolbarBase(GObject.Object):
         """
         super(AltToolbarBase, self).__init__()
 
+        # every per-page registry - deleted pages are evicted from all of
+        # them
+        self._page_registries = PageRegistries(self._on_page_deleted)
         # remember details about when an entryview has been processed
-        self._process_entryview = {}
+        self._process_entryview = self.new_page_registry()
+        # widgets found inside each page
+        self._page_anatomy = self.new_page_registry()
         folder = RB.user_cache_dir() + "/alternate-toolbar"
 
         if not os.path.exists(folder):
             os.makedirs(folder)
 
-        self._entryview_filename = folder + "/entryview_db.xml"
+        self._column_store = ColumnStore(folder)
 
         self._save_cols_loop = 0
 
-        db_version = "1"
-        try:
-            # if the db has not been deleted or is screwed up or is an older
-            #  version than expected then
-            # assume via the except we are starting from a clean db
-            self._entryview_tree = ET.parse(self._entryview_filename)
-            self._entryview_root = self._entryview_tree.getroot()
-
-            db = self._entryview_root.find("database")
-            if db.text != db_version:
-                raise ValueError("wrong database version")
-
-        except:
-            text = """
-                <root>
-                   <pages>
-                   </pages>
-                </root>
-                """
-
-            self._entryview_root = ET.fromstring(text)
-            db = SubElement(self._entryview_root, "database")
-            db.text = db_version
-            self._entryview_tree = ET.ElementTree(self._entryview_root)
-
         # bind the source-toolbar gsettings
         gs = GSetting()
         plugin_settings = gs.get_setting(gs.Path.PLUGIN)
@@ -129,7 +125,8 @@ class AltToolbarBase(GObject.Object):
 
         self._async_functions = []  # array of functions to callback once the
         # toolbar has been setup
-        self.connect('notify::setup-completed', self._on_setup_completed)
+        self.connect('notify::setup-completed',
+                     instrument(self._on_setup_completed))
 
     def initialise(self, plugin):
         """
@@ -142,6 +139,8 @@ class AltToolbarBase(GObject.Object):
         self.shell = plugin.shell
 
         self.find = plugin.find
+        self.find_many = plugin.find_many
+        self.forget = plugin.forget
 
         # finally - complete the headerbar setup after the database has fully
         # loaded because
@@ -171,6 +170,48 @@ class AltToolbarBase(GObject.Object):
 
         return None
 
+    def new_page_registry(self):
+        """
+          return a new PageRegistry whose pages are evicted when they are
+          deleted
+        """
+        return self._page_registries.new_registry()
+
+    def _on_page_deleted(self, page):
+        log.debug("evict %s", page)
+
+        anatomy = self._page_anatomy.get(page)
+        ids = self._process_entryview.get(page)
+        if anatomy is None:
+            return
+
+        if anatomy.move_id is not None:
+            GLib.source_remove(anatomy.move_id)
+            anatomy.move_id = None
+
+        if ids is not None:
+            anatomy.treeview.disconnect(ids['size'])
+            anatomy.treeview.disconnect(ids['changed'])
+
+        # the finder need not keep the page or its widgets
+        self.forget(page)
+        if anatomy.entryview:
+            self.forget(anatomy.entryview)
+
+    def get_page_anatomy(self, page):
+        """
+          return the PageAnatomy for the page - built the first time the
+          page is asked for
+          :param page - RBDisplayPage
+        """
+        anatomy = self._page_anatomy.get(page)
+
+        if anatomy is None:
+            anatomy = PageAnatomy(page, self.find, self.find_many)
+            self._page_anatomy[page] = anatomy
+
+        return anatomy
+
     def post_initialise(self):
         """
           one off post initialisation call
@@ -216,9 +257,19 @@ class AltToolbarBase(GObject.Object):
         :return:
         """
 
-        for page in self._process_entryview:
-            self.disconnect(self._process_entryview[page]['size'])
-            self.disconnect(self._process_entryview[page]['changed'])
+        for page, ids in self._process_entryview.items():
+            treeview = self.get_page_anatomy(page).treeview
+            treeview.disconnect(ids['size'])
+            treeview.disconnect(ids['changed'])
+
+        for page, anatomy in self._page_anatomy.items():
+            if anatomy.move_id is not None:
+                GLib.source_remove(anatomy.move_id)
+                anatomy.move_id = None
+
+        self._page_registries.cleanup()
+
+        self._column_store.flush()
 
         self.purge_builder_content()
 
@@ -283,33 +334,40 @@ class AltToolbarBase(GObject.Object):
            reflect the changed source
            :param page - RBDisplayPage
         """
-        print("reset categories position")
+        log.debug("reset categories position")
         if not page:
-            print("no page")
+            log.debug("no page")
             return
 
         if not hasattr(page.props, 'show_browser'):
-            print("no browser")
+            log.debug("no browser")
             return
 
         if not self.plugin.horiz_categories:
-            print("not horizontal")
+            log.debug("not horizontal")
             return
 
-        propertyview = self.find(page, 'RBPropertyView', 'by_name')
+        anatomy = self.get_page_anatomy(page)
+        if anatomy.categories_reset:
+            # orientation has already been changed for this page
+            return
+
+        propertyview = anatomy.propertyview
 
         if propertyview is None:
             return
 
+        anatomy.categories_reset = True
+
         parent = propertyview.get_parent()
 
         if isinstance(parent, Gtk.Paned):
-            print("paned")
+            log.debug("paned")
             parent.set_orientation(Gtk.Orientation.HORIZONTAL)
         else:
-            print("not paned")
+            log.debug("not paned")
             pane = parent.get_parent()
-            print(pane)
+            log.debug("%s", pane)
             parent.set_orientation(Gtk.Orientation.VERTICAL)
             pane.set_orientation(Gtk.Orientation.HORIZONTAL)
 
@@ -319,9 +377,9 @@ class AltToolbarBase(GObject.Object):
            reflect the changed source
            :param page - RBDisplayPage
         """
-        print("reset entryview")
+        log.debug("reset entryview")
         if not page:
-            print("no page")
+            log.debug("no page")
             return
 
         # workaround for GTK Crashing issues due to the user locale
@@ -333,26 +391,29 @@ class AltToolbarBase(GObject.Object):
         if ("en" not in names[0]):
             return
 
-        try:
-            entryview = page.get_entry_view()
+        anatomy = self.get_page_anatomy(page)
+        treeview = anatomy.treeview
 
-            if not entryview:
-                print("no entry view")
-                return
-        except:
-            # some pages dont have the method to call!
+        if not treeview:
+            log.debug("no entry view")
+            return
+
+        safe_name = safe_string(type(page).__name__)
+        layout = self._column_store.get_layout(safe_name)
+        if page in self._process_entryview and \
+                layout == anatomy.applied_layout:
+            # columns are already as remembered and the signal handlers
+            # connected for this page
             return
 
-        try:
-            treeview = entryview.get_child()
-        except:
-            treeview = self.find(entryview, 'GtkTreeView', 'by_name')
-            # in RB v3.4.3 an RBEntryView doesnt have a child property...
-            # plus the GtkTreeview is now hidden inside two further
-            # containers - so we grab the tree view the hard-way of searching
-            # for the Object Type
+        anatomy.applied_layout = layout
 
         def move_col(*args):
+            anatomy.move_id = None
+            if page not in self._page_anatomy:
+                # deleted whilst the moves were waiting
+                return False
+
             cols = treeview.get_columns()
 
             # treeview.set_reorderable(True)
@@ -361,14 +422,16 @@ class AltToolbarBase(GObject.Object):
             base_col = None
             base_col_found = False
 
-            for col in cols:
+            for index, col in enumerate(cols):
                 title = col.props.title
                 if title is not None and title.strip() != "":
                     if not base_col_found:
-                        base_col = cols[cols.index(col) - 1]
+                        # the untitled column before the first titled one
+                        # - None moves columns to the very start
+                        base_col = cols[index - 1] if index else None
                         base_col_found = True
 
-                    print(title)
+                    log.debug("%s", title)
                     col.set_reorderable(True)
                     current_cols.append(col)
 
@@ -379,73 +442,66 @@ class AltToolbarBase(GObject.Object):
                 treeview.disconnect(self._process_entryview[page]['size'])
 
             # now move columns around depending upon saved values
-            safe_name = self._safe_string(type(page).__name__)
-            lookup = "pages/page[@name='" + safe_name + "']"
-            element = self._entryview_root.find(lookup)
-
-            if element is not None:
-                # we've got something remembered to lets move cols around
-                remembered_col_titles = element.text.split(',')
-                remembered_cols = []
-
-                for title in remembered_col_titles:
-                    compare = title[1:-1]
-                    for col in current_cols:
-                        if col.props.title == compare:
-                            remembered_cols.append(col)
-                            break
-
-                for i in range(len(remembered_cols)):
-                    for col in current_cols:
-                        if col.props.title == remembered_cols[i].props.title:
-                            if current_cols.index(col) != i:
-                                print(i, col.props.title)
-
-                                if i == 0:
-                                    treeview.move_column_after(col, base_col)
-                                else:
-                                    pos = i - 1
-
-                                    treeview.move_column_after(col,
-                                                               remembered_cols[
-                                                                   pos])
-                                break
-
-                                # now reset column widths
-                                # for col in current_cols:
-                                #    safe_col_name = self._safe_string(
-                                # col.props.title)
-
-                                #    lookup = "pages/" + safe_name + "[
-                                # @column='" + \
-                                #             safe_col_name + "']"
-                                #    col_node = self._entryview_root.find(
-                                # lookup)
-
-                                #    if col_node is not None:
-                                #        col.set_fixed_width(int(
-                                # col_node.get("width")))
+            remembered_col_titles = self._column_store.get_order(safe_name)
+
+            if remembered_col_titles is not None:
+                # we've got something remembered so move just the columns
+                # that are out of place - the signal handlers are
+                # disconnected so the moves do not trigger a save
+                by_title = dict((col.props.title, col)
+                                for col in current_cols)
+                moves = plan_column_moves([col.props.title
+                                           for col in current_cols],
+                                          remembered_col_titles)
+
+                for title, after in moves:
+                    log.debug("move %s after %s", title, after)
+                    treeview.move_column_after(
+                        by_title[title],
+                        by_title[after] if after is not None else base_col)
+
+            # now reset column widths - only fixed width columns that do
+            # not expand keep the width they are given
+            for col in current_cols:
+                width = self._column_store.get_width(safe_name,
+                                                     col.props.title)
+                if width and not col.get_expand() and \
+                        col.get_sizing() == Gtk.TreeViewColumnSizing.FIXED:
+                    col.set_fixed_width(width)
 
             # now connect new signal handler
             ids = {}
-            ids['changed'] = treeview.connect('columns-changed',
-                                              self._entryview_column_changed,
-                                              page)
+            ids['changed'] = treeview.connect(
+                'columns-changed',
+                instrument(self._entryview_column_changed), page)
 
-            ids['size'] = treeview.connect('size-allocate',
-                                           self._entryview_size_allocate, page)
+            ids['size'] = treeview.connect(
+                'size-allocate',
+                instrument(self._entryview_size_allocate), page)
 
             self._process_entryview[page] = ids
+            return False
 
         # add a short delay otherwise RB will move after us nulling our
         # achievement
-        Gdk.threads_add_timeout(GLib.PRIORITY_DEFAULT_IDLE, 10,
-                                move_col)
-
-    def _safe_string(self, s):
-        return ''.join([i for i in s if i.isalpha()])
+        if anatomy.move_id is not None:
+            GLib.source_remove(anatomy.move_id)
+        anatomy.move_id = Gdk.threads_add_timeout(GLib.PRIORITY_DEFAULT_IDLE,
+                                                  10, instrument(move_col))
 
     def _entryview_size_allocate(self, treeview, allocation, page):
+        # most allocations - vertical resizes, rows scrolling into view -
+        # leave the columns alone so only act when the titles or widths
+        # differ from the last snapshot
+        columns = tuple((col.props.title, col.get_width())
+                        for col in treeview.get_columns()
+                        if col.props.title)
+
+        anatomy = self.get_page_anatomy(page)
+        if columns == anatomy.columns:
+            return
+
+        anatomy.columns = columns
         self._entryview_column_changed(treeview, page)
 
     def _entryview_column_changed(self, treeview, page):
@@ -479,77 +535,30 @@ class AltToolbarBase(GObject.Object):
             self._save_cols_loop = 1
 
     def _save_entryview_cols(self, treeview, page):
-        print("entryview column changed")
-        print(page)
-
-        def quoted_string(array):
-            return ','.join("'{0}'".format(x) for x in array)
-
-        safe_name = self._safe_string(type(page).__name__)
-        lookup = "pages/page[@name='" + safe_name + "']"
-        node = self._entryview_root.find(lookup)
-
-        pages = self._entryview_root.find("pages")
-
-        if node is None:
-            print("new node")
-            node = SubElement(pages, 'page')
-            node.set("name", safe_name)
+        log.debug("entryview column changed")
+        log.debug("%s", page)
 
         arr = []
+        widths = {}
         cols = treeview.get_columns()
 
         for col in cols:
             if col.props.title is not None and col.props.title != "":
                 arr.append(col.props.title)
-                # print (col.get_width())
-                safe_col_name = self._safe_string(col.props.title)
-                lookup = "pages/" + safe_name + "[@column='" + safe_col_name \
-                         + "']"
-                col_node = self._entryview_root.find(lookup)
-
-                if col_node is None:
-                    col_node = SubElement(pages, safe_name)
-                    col_node.set("column", safe_col_name)
-
-                col_node.set("width", str(col.get_width()))
+                widths[col.props.title] = col.get_width()
 
         if len(arr) < 2:
             # nothing to do so quit before writing
             return
 
-        output = quoted_string(arr)
-        print(output)
-
-        node.text = output
-
-        self._indent_xml(self._entryview_root)
-        self._entryview_tree.write(self._entryview_filename,
-                                   xml_declaration=True)
-
-    def _indent_xml(self, elem, level=0, more_sibs=False):
-        i = "\n"
-        if level:
-            i += (level - 1) * '  '
-        num_kids = len(elem)
-        if num_kids:
-            if not elem.text or not elem.text.strip():
-                elem.text = i + "  "
-                if level:
-                    elem.text += '  '
-            count = 0
-            for kid in elem:
-                self._indent_xml(kid, level + 1, count < num_kids - 1)
-                count += 1
-            if not elem.tail or not elem.tail.strip():
-                elem.tail = i
-                if more_sibs:
-                    elem.tail += '  '
-        else:
-            if level and (not elem.tail or not elem.tail.strip()):
-                elem.tail = i
-                if more_sibs:
-                    elem.tail += '  '
+        log.debug("%s", arr)
+
+        safe_name = safe_string(type(page).__name__)
+        self._column_store.set_columns(safe_name, arr, widths)
+
+        # the page already shows what has just been remembered
+        self.get_page_anatomy(page).applied_layout = \
+            self._column_store.get_layout(safe_name)
 
     def reset_toolbar(self, page):
         """
@@ -557,18 +566,18 @@ class AltToolbarBase(GObject.Object):
            changed source
            :param page - RBDisplayPage
         """
-        print("reset toolbar")
+        log.debug("reset toolbar")
         if not page:
-            print("no page")
+            log.debug("no page")
             return
 
-        toolbar = self.find(page, 'RBSourceToolbar', 'by_name')
+        toolbar = self.get_page_anatomy(page).source_toolbar
 
         if toolbar:
-            print("found")
+            log.debug("found")
             toolbar.set_visible(self.source_toolbar_visible)
         else:
-            print("not found")
+            log.debug("not found")
 
         self.plugin.emit('toolbar-visibility', self.source_toolbar_visible)
 
@@ -602,7 +611,7 @@ class AltToolbarBase(GObject.Object):
         """
            called to toggle the source toolbar
         """
-        print("source_bar_visibility")
+        log.debug("source_bar_visibility")
 
         self.source_toolbar_visible = visibility
         # not self.source_toolbar_visible
@@ -655,7 +664,31 @@ class AltToolbarShared(AltToolbarBase):
         what, width, height = Gtk.icon_size_lookup(Gtk.IconSize.SMALL_TOOLBAR)
         self.icon_width = width
         self.cover_pixbuf = None
+        self._cover_key = None
+        # album key string of the displayed entry
+        self._album_key = None
+        # incremented on every song change - covers requested or scaled
+        # for an earlier song are discarded when they arrive
+        self._cover_generation = 0
+        self._cover_future = None
+        self._window_state_id = None
+        # cover and label markup of the entry expected to play next
+        self._prefetch_id = None
+        self._prefetched_cover = None
+        self._prefetched_markup = {}
+        # (label-template string, compiled LabelTemplate or None)
+        self._user_template = ('', None)
+        # the large hover preview - shown only while the pointer is over
+        # the cover
+        self._cover_hovered = False
+        self._cover_preview_future = None
+        self._cover_paint_pending = None
+        # persistent labels of the inline song display
+        self.song_title = None
+        self.song_artist = None
         self._controllers = {}
+        # page -> (bool, controller) - see is_controlled
+        self._controlled = self.new_page_registry()
         self._tooltip_exceptions = ['album_cover']
         self._moved_controls = []
 
@@ -767,9 +800,22 @@ class AltToolbarShared(AltToolbarBase):
         if self.plugin.inline_label:
             self.song_box.remove(self.song_button_label)
 
-        self.song_progress = Slider(self.shell.props.shell_player)
+        gs = self.plugin.gs
+        self.song_progress = Slider(
+            self.shell.props.shell_player,
+            seek_on_release=self.plugin.plugin_settings[
+                gs.PluginKey.SEEK_ON_RELEASE],
+            seek_interval=self.plugin.plugin_settings[
+                gs.PluginKey.SEEK_INTERVAL])
         self.song_progress_box.pack_start(self.song_progress, False, True, 1)
 
+        # track when the play-controls can actually be seen
+        self.small_bar.connect('map', instrument(self._update_suspended))
+        self.small_bar.connect('unmap', instrument(self._update_suspended))
+        self._window_state_id = self.shell.props.window.connect(
+            'window-state-event', instrument(self._on_window_state_event))
+        self._update_suspended()
+
         # Bring Builtin Actions to plugin
         for (a, b) in ((self.play_button, "play"),
                        (self.prev_button, "play-previous"),
@@ -794,24 +840,33 @@ class AltToolbarShared(AltToolbarBase):
         # capability
         self._repeat = Repeat(self.shell, self.repeat_toggle)
 
+        self.album_cover_eventbox.connect(
+            'enter-notify-event', instrument(self._on_cover_hover))
+        self.album_cover_eventbox.connect(
+            'leave-notify-event', instrument(self._on_cover_hover))
+
         if gtk_version() >= 3.12:
             self.cover_popover = Gtk.Popover.new(self.album_cover)
             image = Gtk.Image.new()
             self.cover_popover.add(image)
+            if Instrumentation().enabled:
+                image.connect('draw', self._on_cover_preview_draw)
 
             self._popover_inprogress = 0
             self.cover_popover.set_modal(False)
-            self.cover_popover.connect('leave-notify-event',
-                                       self._on_cover_popover_mouse_over)
-            self.cover_popover.connect('enter-notify-event',
-                                       self._on_cover_popover_mouse_over)
+            self.cover_popover.connect(
+                'leave-notify-event',
+                instrument(self._on_cover_popover_mouse_over))
+            self.cover_popover.connect(
+                'enter-notify-event',
+                instrument(self._on_cover_popover_mouse_over))
             # detect when mouse moves out of the cover image
             # (it has a parent eventbox)
             box = self.album_cover_eventbox
             box.connect('leave-notify-event',
-                        self._on_cover_popover_mouse_over)
+                        instrument(self._on_cover_popover_mouse_over))
             box.connect('enter-notify-event',
-                        self._on_cover_popover_mouse_over)
+                        instrument(self._on_cover_popover_mouse_over))
 
         cl.switch_locale(cl.Locale.RB)
 
@@ -852,6 +907,16 @@ class AltToolbarShared(AltToolbarBase):
         :return:
         """
 
+        # discard any cover still being fetched or scaled
+        self._cover_generation += 1
+        if self._prefetch_id:
+            GLib.source_remove(self._prefetch_id)
+            self._prefetch_id = None
+
+        if self._window_state_id:
+            self.shell.props.window.disconnect(self._window_state_id)
+            self._window_state_id = None
+
         super(AltToolbarShared, self).cleanup()
 
         if self.sidebar:
@@ -863,19 +928,19 @@ class AltToolbarShared(AltToolbarBase):
             self.rbtreeparent.remove(self.sidebar)  # remove our sidebar
             self.rbtreeparent.add(self.rbtree)  # add the original GtkTree view
 
-        print("####")
+        log.debug("restoring moved controls")
         # child, new-parent, old-parent
         for child, new_parent, old_parent in reversed(self._moved_controls):
             if new_parent:
                 new_parent.remove(child)
-            print(child)
-            print(new_parent)
-            print(old_parent)
+            log.debug("%s", child)
+            log.debug("%s", new_parent)
+            log.debug("%s", old_parent)
             if isinstance(old_parent, Gtk.Grid):
-                print("attaching to grid")
+                log.debug("attaching to grid")
                 old_parent.attach(child, 0, 0, 1, 1)
             else:
-                print("adding to parent")
+                log.debug("adding to parent")
                 old_parent.add(child)
 
     def add_controller(self, controller):
@@ -884,6 +949,8 @@ class AltToolbarShared(AltToolbarBase):
         """
         if controller not in self._controllers:
             self._controllers[controller] = controller
+            # the new controller may suit pages already seen
+            self._controlled.clear()
 
     def is_controlled(self, source):
         """
@@ -896,20 +963,48 @@ class AltToolbarShared(AltToolbarBase):
         if source in self._controllers:
             return True, self._controllers[source]
 
+        # controllers are chosen by the type of source so the choice for a
+        # page never changes
+        cacheable = isinstance(source, RB.DisplayPage)
+        if cacheable and source in self._controlled:
+            return self._controlled[source]
+
+        controlled = False, self._controllers['generic']
+
         # loop through controllers to find one that is most applicable
         for controller_type in self._controllers:
             if self._controllers[controller_type].valid_source(source):
-                return True, self._controllers[controller_type]
+                controlled = True, self._controllers[controller_type]
+                break
+
+        if cacheable:
+            self._controlled[source] = controlled
 
-        return False, self._controllers['generic']
+        return controlled
 
     def show_cover_tooltip(self, tooltip):
         if (self.cover_pixbuf is not None):
-            scale = self.cover_pixbuf.scale_simple(300, 300,
-                                                   GdkPixbuf.InterpType.HYPER)
+            if gtk_version() >= 3.12 and self.cover_popover.get_visible():
+                return False
+
+            started = time.perf_counter()
+
+            scale = None
+            if self._cover_key is not None:
+                scale = CoverArtCache().get(self._cover_key, 300)
+
+            if scale is None:
+                # show a quick low quality preview straight away - the high
+                # quality one replaces it once a worker has scaled it.
+                # NEAREST only samples the 300x300 pixels it needs whereas
+                # the other filters read the whole, possibly huge, cover
+                scale = self.cover_pixbuf.scale_simple(
+                    300, 300, GdkPixbuf.InterpType.NEAREST)
+                self._request_cover_preview(started)
+
             if gtk_version() >= 3.12:
-                if self.cover_popover.get_visible():
-                    return False
+                self._cover_paint_pending = ('cover preview first paint',
+                                             started)
                 image = self.cover_popover.get_child()
                 image.set_from_pixbuf(scale)
                 self.cover_popover.show_all()
@@ -919,6 +1014,49 @@ class AltToolbarShared(AltToolbarBase):
         else:
             return False
 
+    def _request_cover_preview(self, started):
+        """
+          scale the high quality hover preview on a worker and swap it in
+          when it is ready
+        """
+        if self._cover_preview_future is not None and \
+                not self._cover_preview_future.done():
+            return
+
+        generation = self._cover_generation
+
+        def scaled(pixbuf):
+            self._cover_preview_future = None
+            if generation != self._cover_generation:
+                return
+
+            if gtk_version() >= 3.12:
+                if self.cover_popover.get_visible():
+                    self._cover_paint_pending = (
+                        'cover preview high quality paint', started)
+                    self.cover_popover.get_child().set_from_pixbuf(pixbuf)
+            elif self._cover_key is not None and self._cover_hovered:
+                # the cache now has the preview - ask for the tooltip again
+                self.album_cover.trigger_tooltip_query()
+
+        self._cover_preview_future = CoverArtCache().submit(
+            self._cover_key, self.cover_pixbuf, 300, scaled)
+
+    def _on_cover_preview_draw(self, image, cairo_context):
+        if self._cover_paint_pending:
+            name, started = self._cover_paint_pending
+            self._cover_paint_pending = None
+            Instrumentation().record(
+                name, (time.perf_counter() - started) * 1000)
+
+        return False
+
+    def _on_cover_hover(self, widget, eventcrossing):
+        self._cover_hovered = \
+            eventcrossing.type == Gdk.EventType.ENTER_NOTIFY
+
+        return False
+
     def _on_cover_popover_mouse_over(self, widget, eventcrossing):
         if eventcrossing.type == Gdk.EventType.ENTER_NOTIFY:
             if self._popover_inprogress == 0:
@@ -927,9 +1065,9 @@ class AltToolbarShared(AltToolbarBase):
                 self._popover_inprogress = 2
 
             self._popover_inprogress_count = 0
-            print("enter")
+            log.debug("enter")
         else:
-            print("exit")
+            log.debug("exit")
             self._popover_inprogress = 3
 
         # print (eventcrossing.type)
@@ -947,10 +1085,24 @@ class AltToolbarShared(AltToolbarBase):
                 return True
 
         if self._popover_inprogress == 1:
-            print("addding timeout")
+            log.debug("addding timeout")
             self._popover_inprogress = 2
             GLib.timeout_add(100, delayed)
 
+    def _on_window_state_event(self, window, event):
+        iconified = bool(event.new_window_state & Gdk.WindowState.ICONIFIED)
+        if iconified != self.window_iconified:
+            self.window_iconified = iconified
+            self._update_suspended()
+
+        return False
+
+    def _update_suspended(self, *args):
+        suspended = self.window_iconified or not self.small_bar.get_mapped()
+        if suspended != self.suspended:
+            log.debug("play-controls suspended %s", suspended)
+            self.suspended = suspended
+
     def show_slider(self, visibility):
         self.song_box.set_visible(visibility)
 
@@ -958,21 +1110,181 @@ class AltToolbarShared(AltToolbarBase):
         self.song_progress.set_sensitive(toggle)
 
     def display_song(self, entry):
+        key = None
+        if entry is not None:
+            key = entry.create_ext_db_key(RB.RhythmDBPropType.ALBUM)
+
+        if entry is not None and entry == self.entry and \
+                key.to_string() == self._album_key:
+            # the same song with the same album - only the labels need
+            # refreshing, the cover shown or being fetched is still right
+            if self.plugin.inline_label:
+                self._inline_progress_label(entry)
+            else:
+                self._combined_progress_label(entry)
+            return
+
         self.entry = entry
+        self._album_key = key.to_string() if key else None
 
         self.cover_pixbuf = None
+        self._cover_key = None
         self.album_cover.clear()
 
+        self._cover_generation += 1
+        if self._cover_future is not None:
+            self._cover_future.cancel()
+            self._cover_future = None
+
+        if self._cover_preview_future is not None:
+            self._cover_preview_future.cancel()
+            self._cover_preview_future = None
+
+        if self._prefetch_id:
+            GLib.source_remove(self._prefetch_id)
+            self._prefetch_id = None
+
         if self.plugin.inline_label:
             ret = self._inline_progress_label(entry)
         else:
             ret = self._combined_progress_label(entry)
 
         if ret:
-            key = entry.create_ext_db_key(RB.RhythmDBPropType.ALBUM)
-            self.album_art_db.request(key,
-                                      self.display_song_album_art_callback,
-                                      entry)
+            generation = self._cover_generation
+
+            prefetched = self._prefetched_cover
+            self._prefetched_cover = None
+            if prefetched and prefetched[0] == self._album_key:
+                # the cover of this entry was fetched ahead of time
+                self.display_song_album_art_callback(key, prefetched[1])
+            else:
+                def album_art_callback(*args):
+                    if generation == self._cover_generation:
+                        self.display_song_album_art_callback(*args)
+
+                self.album_art_db.request(key, album_art_callback, entry)
+
+            self._prefetch_id = GLib.idle_add(
+                instrument(self._prefetch_next_entry), generation,
+                priority=GLib.PRIORITY_LOW)
+
+    def _next_entry(self):
+        """
+          the entry that will most likely play after the current one -
+          the head of the play queue or the following entry of the
+          playing source when the play order is predictable
+          :return: RBEntry or None
+        """
+        queue = self.shell.props.queue_source.props.query_model
+        treeiter = queue.get_iter_first()
+        if treeiter:
+            return queue.iter_to_entry(treeiter)
+
+        player = self.shell.props.shell_player
+        source = player.get_playing_source()
+        if not source or self.entry is None or \
+                player.props.play_order not in ('linear', 'linear-loop'):
+            return None
+
+        return source.props.query_model.get_next_from_entry(self.entry)
+
+    def _prefetch_next_entry(self, generation):
+        """
+          idle callback - fetch and scale the cover and prepare the label
+          of the next entry so that the next song change is instant
+        """
+        self._prefetch_id = None
+        if generation != self._cover_generation:
+            return False
+
+        entry = self._next_entry()
+        if entry is None or entry == self.entry:
+            return False
+
+        snapshot = EntrySnapshot(self.shell.props.db, entry)
+        self._prefetched_markup = {
+            self._entry_markup_key(entry):
+                self._label_template(snapshot).render(snapshot)}
+
+        key = entry.create_ext_db_key(RB.RhythmDBPropType.ALBUM)
+        key_str = key.to_string()
+
+        def album_art_callback(*args):
+            if generation != self._cover_generation:
+                return
+
+            for data in args:
+                if isinstance(data, GdkPixbuf.Pixbuf):
+                    self._prefetched_cover = (key_str, data)
+                    if CoverArtCache().get(key_str, 34) is None:
+                        CoverArtCache().submit(key_str, data, 34,
+                                               lambda scaled: None)
+                    break
+
+        self.album_art_db.request(key, album_art_callback, entry)
+
+        return False
+
+    def _entry_markup_key(self, entry):
+        return (entry.get_ulong(RB.RhythmDBPropType.ENTRY_ID),
+                self.plugin.inline_label, self.plugin.playing_label,
+                self.plugin.label_template)
+
+    def _label_template(self, snapshot):
+        """
+          the compiled template to render for an entry - the user's
+          label-template if set, otherwise the built-in one that suits the
+          entry
+          :param snapshot: EntrySnapshot of the entry
+        """
+        source = self.plugin.label_template
+        if source != self._user_template[0]:
+            compiled = None
+            if source:
+                try:
+                    compiled = LabelTemplate(source)
+                except ValueError as e:
+                    log.warning("ignoring label-template %r - %s", source, e)
+
+            self._user_template = (source, compiled)
+
+        if self._user_template[1]:
+            return self._user_template[1]
+
+        if self.plugin.inline_label:
+            templates = INLINE_TEMPLATES
+        else:
+            templates = COMBINED_TEMPLATES
+
+        if snapshot.get('stream_title'):
+            return templates['stream']
+
+        if not snapshot.get('album'):
+            return templates['no_album']
+
+        if self.plugin.playing_label:
+            return templates['album']
+
+        return templates['song']
+
+    def _label_lines(self, entry):
+        """
+          the rendered label lines for an entry - prepared ahead of time by
+          _prefetch_next_entry if possible
+        """
+        snapshot = EntrySnapshot(self.shell.props.db, entry)
+
+        lines = None
+        if not snapshot.get('stream_title'):
+            # stream metadata only arrives once the entry plays so a
+            # prefetched label cannot have used it
+            lines = self._prefetched_markup.pop(
+                self._entry_markup_key(entry), None)
+
+        if lines is None:
+            lines = self._label_template(snapshot).render(snapshot)
+
+        return lines
 
     def _inline_progress_label(self, entry):
 
@@ -983,96 +1295,40 @@ class AltToolbarShared(AltToolbarBase):
 
         self.inline_box.set_visible(True)
 
-        db = self.shell.props.db
-        stream_title = \
-            db.entry_request_extra_metadata(entry,
-                                            RB.RHYTHMDB_PROP_STREAM_SONG_TITLE)
-        stream_artist = \
-            db.entry_request_extra_metadata(entry,
-                                            RB.RHYTHMDB_PROP_STREAM_SONG_ARTIST)
+        lines = self._label_lines(entry)
+        self._set_inline_labels(lines[0],
+                                " ".join(line for line in lines[1:] if line))
+
+        return True
 
-        def set_labels(title, artist):
+    def _set_inline_labels(self, title, artist):
+        """
+          show the title and artist markup in the inline box - the two
+          labels are created once and then only updated when their markup
+          changes so that stream title updates do not relayout the toolbar
+        """
+        if self.song_title is None:
             for child in self.inline_box:
                 self.inline_box.remove(child)
 
             self.song_title = Gtk.Label()
-            self.song_title.set_markup(title)
             self.song_title.set_ellipsize(Pango.EllipsizeMode.END)
             self.song_title.show()
             self.inline_box.pack_start(self.song_title, False, True, 0)
-            print(artist)
-            if artist != "" or artist:
-                print("adding artist")
-                self.song_artist = Gtk.Label()
-                self.song_artist.set_markup(artist)
-                self.song_artist.set_ellipsize(Pango.EllipsizeMode.END)
-                self.song_artist.show()
-                self.inline_box.pack_start(self.song_artist, False, True, 1)
-
-        if stream_title:
-            print("stream_title")
-            if stream_artist:
-                artist_markup = "<small>{artist}</small>".format(
-                    artist=GLib.markup_escape_text(stream_artist))
-            else:
-                artist_markup = ""
-
-            title_markup = "<b>{title}</b>".format(
-                title=GLib.markup_escape_text(stream_title))
-
-            set_labels(title_markup, artist_markup)
-
-            return True
-
-        album = entry.get_string(RB.RhythmDBPropType.ALBUM)
-        if not album or album == "":
-            print("album")
-            title_markup = "<b>{title}</b>".format(
-                title=GLib.markup_escape_text(
-                    entry.get_string(RB.RhythmDBPropType.TITLE)))
-
-            artist = entry.get_string(RB.RhythmDBPropType.ARTIST)
-            if artist and artist != "":
-                artist_markup = "<small>{artist}</small>".format(
-                    artist=GLib.markup_escape_text(
-                        entry.get_string(RB.RhythmDBPropType.ARTIST)))
-            else:
-                artist_markup = ""
 
-            set_labels(title_markup, artist_markup)
+            self.song_artist = Gtk.Label()
+            self.song_artist.set_ellipsize(Pango.EllipsizeMode.END)
+            self.inline_box.pack_start(self.song_artist, False, True, 1)
 
-            return True
-
-        if self.plugin.playing_label:
-            print("playing_label")
-            year = entry.get_ulong(RB.RhythmDBPropType.DATE)
-            if year == 0:
-                year = date.today().year
-            else:
-                year = datetime.fromordinal(year).year
-
-            title_markup = "<b>{album}</b>".format(
-                album=GLib.markup_escape_text(
-                    entry.get_string(RB.RhythmDBPropType.ALBUM)))
-            artist_markup = "<small>{genre} - {year}</small>".format(
-                genre=GLib.markup_escape_text(
-                    entry.get_string(RB.RhythmDBPropType.GENRE)),
-                year=GLib.markup_escape_text(str(year)))
+        if self.song_title.get_label() != title:
+            self.song_title.set_markup(title)
 
-            set_labels(title_markup, artist_markup)
+        if artist:
+            if self.song_artist.get_label() != artist:
+                self.song_artist.set_markup(artist)
+            self.song_artist.show()
         else:
-            print("not playing_label")
-            title_markup = "<b>{title}</b>".format(
-                title=GLib.markup_escape_text(
-                    entry.get_string(RB.RhythmDBPropType.TITLE)))
-
-            artist_markup = "<small>{artist}</small>".format(
-                artist=GLib.markup_escape_text(
-                    entry.get_string(RB.RhythmDBPropType.ARTIST)))
-
-            set_labels(title_markup, artist_markup)
-
-        return True
+            self.song_artist.hide()
 
     def _combined_progress_label(self, entry):
         """
@@ -1085,56 +1341,8 @@ class AltToolbarShared(AltToolbarBase):
             self.song_button_label.set_label("")
             return False
 
-        db = self.shell.props.db
-        stream_title = \
-            db.entry_request_extra_metadata(entry,
-                                            RB.RHYTHMDB_PROP_STREAM_SONG_TITLE)
-        stream_artist = \
-            db.entry_request_extra_metadata(entry,
-                                            RB.RHYTHMDB_PROP_STREAM_SONG_ARTIST)
-
-        if stream_title:
-            if stream_artist:
-                markup = "<small><b>{title}</b> {artist}</small>".format(
-                    title=GLib.markup_escape_text(stream_title),
-                    artist=GLib.markup_escape_text(stream_artist))
-            else:
-                markup = "<small><b>{title}</b></small>".format(
-                    title=GLib.markup_escape_text(stream_title))
-            self.song_button_label.set_markup(markup)
-            return True
-
-        album = entry.get_string(RB.RhythmDBPropType.ALBUM)
-        if not album or album == "":
-            self.song_button_label.set_markup(
-                "<small><b>{title}</b></small>".format(
-                    title=GLib.markup_escape_text(
-                        entry.get_string(RB.RhythmDBPropType.TITLE))))
-            return True
-
-        if self.plugin.playing_label:
-            year = entry.get_ulong(RB.RhythmDBPropType.DATE)
-            if year == 0:
-                year = date.today().year
-            else:
-                year = datetime.fromordinal(year).year
-
-            self.song_button_label.set_markup(
-                "<small>{album} - {genre} - {year}</small>".format(
-                    album=GLib.markup_escape_text(
-                        entry.get_string(RB.RhythmDBPropType.ALBUM)),
-                    genre=GLib.markup_escape_text(
-                        entry.get_string(RB.RhythmDBPropType.GENRE)),
-                    year=GLib.markup_escape_text(str(year))))
-        else:
-            self.song_button_label.set_markup(
-                "<small><b>{title}</b> {album} - {artist}</small>".format(
-                    title=GLib.markup_escape_text(
-                        entry.get_string(RB.RhythmDBPropType.TITLE)),
-                    album=GLib.markup_escape_text(
-                        entry.get_string(RB.RhythmDBPropType.ALBUM)),
-                    artist=GLib.markup_escape_text(
-                        entry.get_string(RB.RhythmDBPropType.ARTIST))))
+        self.song_button_label.set_markup(
+            " ".join(line for line in self._label_lines(entry) if line))
 
         return True
 
@@ -1150,18 +1358,33 @@ class AltToolbarShared(AltToolbarBase):
             if isinstance(data, GdkPixbuf.Pixbuf):
                 break
 
+        # the album key identifies the cover in the scaled pixbuf cache
+        key = None
+        for arg in args:
+            if isinstance(arg, RB.ExtDBKey):
+                key = arg.to_string()
+                break
+
         if ((data is not None) and (isinstance(data, GdkPixbuf.Pixbuf))):
             self.cover_pixbuf = data
-            scale_cover = \
-                self.cover_pixbuf.scale_simple(34, 34,
-                                               GdkPixbuf.InterpType.HYPER)
-
-            self.album_cover.set_from_pixbuf(scale_cover)
+            self._cover_key = key
+            generation = self._cover_generation
+
+            def scaled(scale_cover):
+                if generation == self._cover_generation:
+                    self._cover_future = None
+                    self.album_cover.set_from_pixbuf(scale_cover)
+                    if self._cover_hovered:
+                        self.album_cover.trigger_tooltip_query()
+
+            self._cover_future = CoverArtCache().scale_async(
+                key, self.cover_pixbuf, 34, scaled)
         else:
             self.cover_pixbuf = None
+            self._cover_key = None
             self.album_cover.clear()
-
-        self.album_cover.trigger_tooltip_query()
+            if self._cover_hovered:
+                self.album_cover.trigger_tooltip_query()
 
     def show_cover(self, visibility):
         self.album_cover.set_visible(self.plugin.show_album_art)
@@ -1261,7 +1484,7 @@ class AltToolbarShared(AltToolbarBase):
         else:
             handler = eval(handler_name)
 
-        object.connect(sig_name, handler)
+        object.connect(sig_name, instrument(handler))
 
     def purge_builder_content(self):
         for name in self.__builder_obj_names:
@@ -1350,7 +1573,7 @@ class AltToolbarCompact(AltToolbarShared):
             else:
                 self.show_small_bar_bottom()
             action.set_active(True)
-            print("not hidden but compact")
+            log.debug("not hidden but compact")
         else:
             action.set_active(False)
 
@@ -1381,13 +1604,14 @@ class AltToolbarHeaderBar(AltToolbarShared):
         """
         super(AltToolbarHeaderBar, self).__init__()
 
-        self.sources = {}
+        # page -> controller
+        self.sources = self.new_page_registry()
         self.searchbar = None
 
         self.source_toolbar_visible = False  # override - for headerbars source
         # toolbar is not visible
 
-        self._always_visible_sources = {}
+        self._always_visible_sources = self.new_page_registry()
 
     def _on_key_press(self, widget, event):
         self.searchbar.handle_event(event)
@@ -1428,7 +1652,7 @@ class AltToolbarHeaderBar(AltToolbarShared):
         """
            remember which sources always have the song-category buttons enabled
         """
-        self._always_visible_sources[source] = source
+        self._always_visible_sources[source] = True
 
     def on_startup(self, *args):
         super(AltToolbarHeaderBar, self).on_startup(*args)
@@ -1438,10 +1662,10 @@ class AltToolbarHeaderBar(AltToolbarShared):
 
         self.library_radiobutton_toggled(None)
 
-        self.library_browser_radiobutton.connect('toggled',
-                                                 self.library_radiobutton_toggled)
-        self.library_song_radiobutton.connect('toggled',
-                                              self.library_radiobutton_toggled)
+        self.library_browser_radiobutton.connect(
+            'toggled', instrument(self.library_radiobutton_toggled))
+        self.library_song_radiobutton.connect(
+            'toggled', instrument(self.library_radiobutton_toggled))
 
         self._set_toolbar_controller()
 
@@ -1480,7 +1704,7 @@ class AltToolbarHeaderBar(AltToolbarShared):
         cl.switch_locale(cl.Locale.RB)
 
     def library_radiobutton_toggled(self, toggle_button):
-        print("library_radiobutton_toggled")
+        log.debug("library_radiobutton_toggled")
         if not self.setup_completed:
             return
 
@@ -1500,7 +1724,7 @@ class AltToolbarHeaderBar(AltToolbarShared):
 
         val = True
         if self.library_song_radiobutton.get_active():
-            print("song active")
+            log.debug("song active")
             val = False
 
         self.shell.props.selected_page.props.show_browser = val
@@ -1512,24 +1736,20 @@ class AltToolbarHeaderBar(AltToolbarShared):
         if not source:
             return False, None
 
-        toolbar = self.find(source, 'RBSourceToolbar', 'by_name')
+        toolbar = self.get_page_anatomy(source).source_toolbar
         if not toolbar:
             return False, None
 
-        ret = self.find(toolbar, 'GtkToggleButton', 'by_name', label)
-
-        if ret:
-            return True, ret
-
-        ret = self.find(toolbar, 'GtkButton', 'by_name', label)
-
-        if ret:
-            return True, ret
+        # one walk of the toolbar for all the button types we accept - in
+        # order of preference
+        buttons = self.find_many(toolbar,
+                                 [('GtkToggleButton', 'by_name', label),
+                                  ('GtkButton', 'by_name', label),
+                                  ('GtkMenuButton', 'by_name', label)])
 
-        ret = self.find(toolbar, 'GtkMenuButton', 'by_name', label)
-
-        if ret:
-            return True, ret
+        for ret in buttons:
+            if ret:
+                return True, ret
 
         return False, None
 
@@ -1633,20 +1853,20 @@ class AltToolbarHeaderBar(AltToolbarShared):
         action = self.plugin.toggle_action_group.get_action('ToggleToolbar')
         if not self.plugin.start_hidden:
             action.set_active(True)
-            print("not hidden")
+            log.debug("not hidden")
         else:
             action.set_active(False)
             self.set_visible(False)
 
     def _resize_source(self, page):
         if page:
-            child = self.find(page, 'GtkGrid', "by_name")
+            child = self.get_page_anatomy(page).grid
             # hard-coded test for sources where grid is this value
             if child and child.props.margin_top == 6:
                 child.props.margin_top = 0
 
     def reset_toolbar(self, page):
-        print(page)
+        log.debug("%s", page)
         super(AltToolbarHeaderBar, self).reset_toolbar(page)
 
         self.library_radiobutton_toggled(None)
@@ -18,15 +18,118 @@
 # along with this program; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
 
+from gi.repository import GLib
+from gi.repository import GObject
 from gi.repository import Gtk
 
 
+class SeekThrottle(object):
+    """Rate limit the seeks made while the user moves the slider.
+
+    At most one seek is made every interval milliseconds, the last
+    requested position always being applied. With on_release a drag only
+    previews the position under the pointer and the seek itself is made
+    when the slider is released.
+
+    The clock and timer are GLib's unless others are given.
+    """
+
+    def __init__(self, seek, preview, interval=100, on_release=False,
+                 clock=None, timeout_add=None, source_remove=None):
+        """
+        :param seek: function making the seek to the slider position
+        :param preview: function showing the slider position while a seek
+        waits for the release
+        :param interval: `int` milliseconds between seeks
+        :param on_release: `bool` seek only when the slider is released
+        :param clock: function returning monotonic time in microseconds
+        :param timeout_add: function (milliseconds, callback) returning a
+        source id
+        :param source_remove: function removing a source by id
+        """
+        self._seek = seek
+        self._preview = preview
+        self.interval = interval
+        self.on_release = on_release
+        self._clock = clock or GLib.get_monotonic_time
+        self._timeout_add = timeout_add or GLib.timeout_add
+        self._source_remove = source_remove or GLib.source_remove
+
+        self.dragging = self.drag_moved = False
+        self.deferred = False
+        self._last_seek = 0
+        self._timeout_id = None
+
+    def press(self):
+        self.dragging = True
+        self.drag_moved = False
+
+    def motion(self):
+        if not self.dragging:
+            return
+        self.drag_moved = True
+        self.request()
+
+    def release(self):
+        if not self.dragging:
+            return
+        self.dragging = False
+        if self.drag_moved or self.deferred:
+            # the final position is always applied
+            self.apply()
+        self.drag_moved = False
+
+    def apply(self):
+        """Seek to the slider position now."""
+        self.cancel()
+        self.deferred = False
+        self._last_seek = self._clock()
+        self._seek()
+
+    def request(self):
+        """Seek to the slider position subject to the seek rate limit."""
+        if self.dragging and self.on_release:
+            self.deferred = True
+            self._preview()
+            return
+
+        if self._timeout_id is not None:
+            # the pending seek will pick up the latest position
+            return
+
+        wait = self.interval - (self._clock() - self._last_seek) // 1000
+        if wait <= 0:
+            self.apply()
+        else:
+            self._timeout_id = self._timeout_add(wait, self._pending)
+
+    def cancel(self):
+        """Forget any seek waiting on the rate limit."""
+        if self._timeout_id is not None:
+            self._source_remove(self._timeout_id)
+            self._timeout_id = None
+
+    def _pending(self):
+        self._timeout_id = None
+        self.apply()
+        return False
+
+
 class Slider(Gtk.Scale):
     """Wrapper around Gtk.Scale to handle signals from user and
     Rhythmbox itself.
+
+    Seeks requested by the user are rate limited - see SeekThrottle. With
+    seek_on_release a drag only emits 'seek-preview' with the position
+    under the pointer.
     """
 
-    def __init__(self, shell_player):
+    __gsignals__ = {
+        'seek-preview': (GObject.SIGNAL_RUN_LAST, None, (float,))
+    }
+
+    def __init__(self, shell_player, seek_on_release=False,
+                 seek_interval=100):
         super().__init__()
         self.set_orientation(Gtk.Orientation.HORIZONTAL)
         self.adjustment = Gtk.Adjustment(0, 0, 10, 1, 10, 0)
@@ -36,49 +139,61 @@ class Slider(Gtk.Scale):
         self.set_sensitive(False)
 
         self.shell_player = shell_player
-        self.dragging = self.drag_moved = False
+        self.throttle = SeekThrottle(self._set_playing_time,
+                                     self._seek_preview,
+                                     interval=seek_interval,
+                                     on_release=seek_on_release)
 
         self.connect('button-press-event', slider_press_callback)
         self.connect('motion-notify-event', slider_moved_callback)
         self.connect('button-release-event', slider_release_callback)
         self.connect('focus-out-event', slider_release_callback)
+        self.connect('destroy', slider_destroy_callback)
         self.changed_callback_id = self.connect('value-changed',
                                                 slider_changed_callback)
 
         self.set_size_request(150, -1)
         self.show_all()
 
-    def apply_position(self):
+    @property
+    def dragging(self):
+        return self.throttle.dragging
+
+    @property
+    def seek_on_release(self):
+        return self.throttle.on_release
+
+    def _set_playing_time(self):
         """Sync slider elapsed time with Rhythmbox."""
         self.shell_player.set_playing_time(self.adjustment.get_value())
 
+    def _seek_preview(self):
+        self.emit('seek-preview', self.adjustment.get_value())
+
 
 def slider_press_callback(slider, event):
     """Handle 'button-press-event' signals."""
-    slider.dragging = True
-    slider.drag_moved = False
+    slider.throttle.press()
     return False
 
 
 def slider_moved_callback(slider, event):
     """Handle 'motion-notify-event' signals."""
-    if not slider.dragging:
-        return False
-    slider.drag_moved = True
-    slider.apply_position()
+    slider.throttle.motion()
     return False
 
 
 def slider_release_callback(slider, event):
     """Handle 'button-release-event' and 'focus-out-event' signals."""
-    if not slider.dragging:
-        return False
-    if slider.drag_moved:
-        slider.apply_position()
-    slider.dragging = slider.drag_moved = False
+    slider.throttle.release()
     return False
 
 
 def slider_changed_callback(slider):
     """Handle 'value-changed-event' signals."""
-    slider.apply_position()
+    slider.throttle.request()
+
+
+def slider_destroy_callback(slider):
+    """Handle 'destroy' signals."""
+    slider.throttle.cancel()
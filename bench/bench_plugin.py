@@ -0,0 +1,442 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+"""
+headless benchmarks of the plugin driven by the stand-in Rhythmbox of
+fakerb - no display, Xvfb or Rhythmbox is needed
+
+    python3 bench/bench_plugin.py [--sources N] [--entries N] [--json]
+
+The stand-in widgets do no layout or drawing, so the numbers measure the
+plugin's own work on each path - widget searches, bookkeeping, label
+formatting and column persistence. That is the part that changes from
+one version of the plugin to the next.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import fakerb  # noqa: E402
+from fakegi import Container, Label, Object, ToggleButton  # noqa: E402
+from fakegi import main_loop  # noqa: E402
+from gi.repository import RB  # noqa: E402
+
+CACHE = tempfile.mkdtemp(prefix='alttoolbar-bench-')
+RB.user_cache_dir = lambda: CACHE
+RB.locale_dir = lambda: CACHE
+
+import alttoolbar_controller  # noqa: E402
+import alttoolbar_type  # noqa: E402
+from alttoolbar_controller import AltControllerCategory  # noqa: E402
+from alttoolbar_entryview import ColumnStore  # noqa: E402
+from alttoolbar_finder import WidgetFinder  # noqa: E402
+from alttoolbar_label import TimeLabel  # noqa: E402
+from alttoolbar_page import PageAnatomy  # noqa: E402
+from alttoolbar_sidebar import AltToolbarSidebar  # noqa: E402
+
+
+def plugin_class():
+    """ AltToolbarPlugin - its module name is not importable as is """
+    spec = importlib.util.spec_from_file_location(
+        'alternative_toolbar', os.path.join(fakerb.fakegi.ROOT,
+                                            'alternative-toolbar.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.AltToolbarPlugin
+
+
+Plugin = plugin_class()
+
+
+# the controllers of the compact and headerbar toolbars - most specific
+# first, as AltToolbarShared.initialise adds them
+CONTROLLERS = ['AltMusicLibraryController', 'AltSoundCloudController',
+               'AltCoverArtBrowserController',
+               'AltCoverArtPlaySourceController', 'AltQueueController',
+               'AltStandardOnlineController', 'AltStandardLocalController',
+               'AltRadioController', 'AltLastFMController',
+               'AltPlaylistController', 'AltErrorsController',
+               'AltPodcastController', 'AltAndroidController']
+
+
+def page_change_toolbar(plugin, kind):
+    """
+    a toolbar of the given kind - standard, compact or headerbar - ready
+    for page changes. The widgets of the compact and headerbar toolbars
+    need a display so only the state their page changes use is set up
+    """
+    if kind == 'standard':
+        toolbar = alttoolbar_type.AltToolbarStandard()
+        toolbar.initialise(plugin)
+        return toolbar
+
+    toolbar = object.__new__(alttoolbar_type.AltToolbarCompact
+                             if kind == 'compact' else
+                             alttoolbar_type.AltToolbarHeaderBar)
+    alttoolbar_type.AltToolbarBase.__init__(toolbar)
+    alttoolbar_type.AltToolbarBase.initialise(toolbar, plugin)
+    # nothing was built so there is nothing to purge
+    toolbar.purge_builder_content = lambda: None
+
+    toolbar._controllers = {}
+    toolbar._controlled = toolbar.new_page_registry()
+    toolbar._controllers['generic'] = \
+        alttoolbar_controller.AltGenericController(toolbar)
+    for name in CONTROLLERS:
+        toolbar.add_controller(getattr(alttoolbar_controller, name)(toolbar))
+
+    if kind == 'headerbar':
+        toolbar.sources = toolbar.new_page_registry()
+        toolbar._always_visible_sources = toolbar.new_page_registry()
+        toolbar.searchbar = None
+        toolbar.source_toolbar_visible = False
+        toolbar.setup_completed = True
+        toolbar.end_box = Container('GtkBox')
+        toolbar.library_box = Container('GtkBox')
+        toolbar.library_song_radiobutton = ToggleButton()
+        toolbar.library_browser_radiobutton = ToggleButton()
+
+    return toolbar
+
+
+def bench_page_change(shell, seed=0, kind='standard'):
+    """
+    select every source in turn with a standard, compact or headerbar
+    toolbar - the first time each source is seen and again once everything
+    has been seen. Each source type has a remembered column order so first
+    visits move columns
+    """
+    rng = random.Random(seed)
+    WidgetFinder().clear()
+    main_loop.sources.clear()
+
+    plugin = Object()
+    plugin.shell = shell
+    plugin.find = Plugin.find
+    plugin.find_many = Plugin.find_many
+    plugin.forget = Plugin.forget
+    plugin.horiz_categories = True
+
+    toolbar = page_change_toolbar(plugin, kind)
+    # the startup call needs a real window - it is not measured
+    main_loop.sources.clear()
+
+    for source_type in fakerb.SOURCE_TYPES:
+        titles = rng.sample(fakerb.TITLES, len(fakerb.TITLES))
+        toolbar._column_store.set_columns(
+            source_type.__name__, titles, dict.fromkeys(titles, 120))
+
+    changer = types.SimpleNamespace(toolbar_type=toolbar,
+                                    _page_change_page=None,
+                                    _page_change_id=None)
+
+    prefix = 'page change' if kind == 'standard' else \
+        'page change ({})'.format(kind)
+    results = {}
+    for visit in ('first visit', 'revisit'):
+        traversed = WidgetFinder().traversed
+        start = time.perf_counter()
+        for page in shell.pages:
+            # a selected page is shown and so realized
+            page.realize()
+            shell.props.selected_page = page
+            changer._page_change_page = page
+            Plugin._process_page_change(changer)
+            # the column moves wait on a short timeout
+            main_loop.run_pending()
+        elapsed = time.perf_counter() - start
+        results['{} - {}'.format(prefix, visit)] = (
+            elapsed, len(shell.pages), WidgetFinder().traversed - traversed)
+
+    if kind == 'standard':
+        results['column moves'] = (0, 1, sum(
+            toolbar.get_page_anatomy(page).treeview.moves
+            for page in shell.pages))
+        toolbar.cleanup()
+    else:
+        # the shared cleanup puts back the widgets initialise moved
+        alttoolbar_type.AltToolbarBase.cleanup(toolbar)
+    shell.props.selected_page = shell.pages[0] if shell.pages else None
+    main_loop.sources.clear()
+    return results
+
+
+def bench_find_many(shell):
+    """
+    the searches of a headerbar page change the first time each source is
+    seen - the page anatomy and the Browse button of the source toolbar -
+    made with one find_many per root and as the find calls they replace
+    """
+    finder = WidgetFinder()
+    queries = [query for _, query in PageAnatomy.QUERIES]
+    buttons = [(name, 'by_name', 'Browse') for name in
+               ('GtkToggleButton', 'GtkButton', 'GtkMenuButton')]
+
+    def many(page):
+        toolbar = finder.find_many(page, queries)[1]
+        finder.find_many(toolbar, buttons)
+
+    def one_by_one(page):
+        toolbar = [finder.find(page, *query) for query in queries][1]
+        for query in buttons:
+            # the first button found is the one used
+            if finder.find(toolbar, *query):
+                break
+
+    results = {}
+    for name, search in (('headerbar searches - find_many', many),
+                         ('headerbar searches - find', one_by_one)):
+        traversed = finder.traversed
+        start = time.perf_counter()
+        for page in shell.pages:
+            finder.clear()
+            search(page)
+        elapsed = time.perf_counter() - start
+        results[name] = (elapsed, len(shell.pages),
+                         finder.traversed - traversed)
+
+    finder.clear()
+    return results
+
+
+def bench_elapsed(shell, ticks):
+    """
+    shell player elapsed-changed ticks over a long song
+    """
+    class Player(object):
+        _sh_on_playing = Plugin._sh_on_playing
+        _update_time_label = Plugin._update_time_label
+
+    slider = types.SimpleNamespace(
+        dragging=False, seek_on_release=False, changed_callback_id=1,
+        handler_block=lambda handler_id: contextlib.nullcontext(),
+        adjustment=types.SimpleNamespace(set_value=lambda value: None))
+
+    player = Player()
+    player.song_duration = 5400
+    player._time_label = None
+    player._time_label_format = TimeLabel(player.song_duration)
+    player.toolbar_type = types.SimpleNamespace(
+        suspended=False, song_progress=slider, total_time_label=Label())
+
+    shell_player = shell.props.shell_player
+    start = time.perf_counter()
+    for tick in range(ticks):
+        player._sh_on_playing(shell_player, tick % player.song_duration)
+    elapsed = time.perf_counter() - start
+
+    return {'elapsed tick': (elapsed, ticks,
+                             player.toolbar_type.total_time_label.markups)}
+
+
+def shared_toolbar(shell):
+    """
+    the display_song state of an AltToolbarShared without building its
+    widgets
+    """
+    toolbar = object.__new__(alttoolbar_type.AltToolbarShared)
+    Object.__init__(toolbar)
+    toolbar.shell = shell
+    toolbar.plugin = types.SimpleNamespace(inline_label=True,
+                                           playing_label=False,
+                                           label_template='')
+    toolbar.entry = None
+    toolbar._album_key = None
+    toolbar.cover_pixbuf = None
+    toolbar._cover_key = None
+    toolbar.album_cover = types.SimpleNamespace(clear=lambda: None)
+    toolbar.album_art_db = fakerb.ExtDB()
+    toolbar._cover_generation = 0
+    toolbar._cover_future = None
+    toolbar._cover_preview_future = None
+    toolbar._prefetch_id = None
+    toolbar._prefetched_cover = None
+    toolbar._prefetched_markup = {}
+    toolbar._user_template = ('', None)
+    toolbar.inline_box = Container('GtkBox')
+    toolbar.song_title = None
+    toolbar.song_artist = None
+    return toolbar
+
+
+def bench_display_song(shell, songs):
+    """
+    play through the library - each song change shows the song and
+    prefetches the next one when idle - then refresh the label of one
+    song as a stream title update would
+    """
+    main_loop.sources.clear()
+    toolbar = shared_toolbar(shell)
+    entries = shell.props.db.entries[:songs]
+
+    start = time.perf_counter()
+    for entry in entries:
+        toolbar.display_song(entry)
+        main_loop.run_pending()
+    changes = time.perf_counter() - start
+
+    markups = toolbar.song_title.markups
+    start = time.perf_counter()
+    for _ in entries:
+        toolbar.display_song(entries[-1])
+    refreshes = time.perf_counter() - start
+
+    main_loop.sources.clear()
+    return {'song change': (changes, len(entries),
+                            toolbar.album_art_db.requests),
+            'same song refresh': (refreshes, len(entries),
+                                  toolbar.song_title.markups - markups)}
+
+
+class Controller(object):
+
+    def __init__(self, category):
+        self.category = category
+
+    def get_category(self):
+        return self.category
+
+    def get_gicon(self, source):
+        return None
+
+
+def bench_sidebar(shell):
+    """
+    populate the enhanced sidebar from the display page model
+    """
+    main_loop.sources.clear()
+    controllers = {}
+    for source_type, category in zip(
+            fakerb.SOURCE_TYPES,
+            (AltControllerCategory.LOCAL, AltControllerCategory.PLAYLIST,
+             AltControllerCategory.PLAYLIST, AltControllerCategory.ONLINE,
+             AltControllerCategory.ONLINE, AltControllerCategory.OTHER)):
+        controllers[source_type] = Controller(category)
+
+    toolbar = Object()
+    toolbar.shell = shell
+    toolbar.plugin = types.SimpleNamespace()
+    toolbar.is_controlled = lambda source: (True,
+                                            controllers[type(source)])
+
+    sidebar = AltToolbarSidebar(toolbar, None)
+    sidebar.expanders = '{1:True}'
+
+    # the population runs in a delayed callback
+    start = time.perf_counter()
+    main_loop.run_pending()
+    elapsed = time.perf_counter() - start
+
+    rows = len(sidebar._rows)
+    sidebar.cleanup()
+    main_loop.sources.clear()
+    return {'sidebar population': (elapsed, 1, rows)}
+
+
+def bench_columns(shell, seed=0):
+    """
+    remember the columns of every source, write the store and read it
+    back
+    """
+    rng = random.Random(seed)
+    folder = tempfile.mkdtemp(prefix='alttoolbar-columns-', dir=CACHE)
+    store = ColumnStore(folder)
+
+    changes = []
+    for page in shell.pages:
+        titles = rng.sample(fakerb.TITLES, rng.randint(6, len(fakerb.TITLES)))
+        changes.append(("{}{}".format(type(page).__name__, len(changes)),
+                        titles,
+                        dict((title, rng.randint(50, 400))
+                             for title in titles)))
+
+    start = time.perf_counter()
+    for name, order, widths in changes:
+        store.set_columns(name, order, widths)
+    remembered = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store.flush()
+    written = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ColumnStore(folder)
+    read = time.perf_counter() - start
+
+    main_loop.sources.clear()
+    return {'columns remembered': (remembered, len(changes), 0),
+            'column store write': (written, 1, len(changes)),
+            'column store read': (read, 1, len(changes))}
+
+
+def run(sources=300, entries=10000, ticks=100000, songs=2000, filler=40):
+    """
+    :return: dict of benchmark name -> (seconds, operations, count) where
+    count is a benchmark specific figure - widgets traversed, labels set,
+    rows or pages
+    """
+    shell = fakerb.build_shell(sources, entries, filler)
+    results = {}
+    results.update(bench_page_change(shell))
+    results.update(bench_page_change(shell, kind='compact'))
+    results.update(bench_page_change(shell, kind='headerbar'))
+    results.update(bench_find_many(shell))
+    results.update(bench_elapsed(shell, ticks))
+    results.update(bench_display_song(shell, min(songs, entries)))
+    results.update(bench_sidebar(shell))
+    results.update(bench_columns(shell))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sources', type=int, default=300)
+    parser.add_argument('--entries', type=int, default=10000)
+    parser.add_argument('--ticks', type=int, default=100000)
+    parser.add_argument('--songs', type=int, default=2000)
+    parser.add_argument('--json', action='store_true',
+                        help='print the results as JSON')
+    args = parser.parse_args()
+
+    results = run(args.sources, args.entries, args.ticks, args.songs)
+
+    if args.json:
+        print(json.dumps(dict((name, {'seconds': seconds, 'ops': ops,
+                                      'count': count})
+                              for name, (seconds, ops, count)
+                              in results.items()), indent=1))
+        return
+
+    print("{:<38} {:>8} {:>12} {:>10}".format("benchmark", "ops",
+                                              "us per op", "count"))
+    for name, (seconds, ops, count) in results.items():
+        print("{:<38} {:>8} {:>12.2f} {:>10}".format(
+            name, ops, seconds / ops * 1e6, count))
+
+
+if __name__ == '__main__':
+    main()
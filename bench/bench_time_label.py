@@ -0,0 +1,57 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+"""
+micro-benchmark of the elapsed / total time label - formatting both
+halves on every elapsed tick against TimeLabel formatting only the
+elapsed half
+
+    python3 bench/bench_time_label.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, 'tests'))
+import fakegi  # noqa: E402,F401
+from alttoolbar_label import TimeLabel  # noqa: E402
+from test_label import per_tick_label  # noqa: E402
+
+TICKS = 100000
+
+
+def main():
+    for duration in (245, 3661):
+        label = TimeLabel(duration)
+        fast = min(timeit.repeat(
+            lambda: [label.format(s % duration) for s in range(1000)],
+            number=TICKS // 1000, repeat=5))
+        slow = min(timeit.repeat(
+            lambda: [per_tick_label(s % duration, duration)
+                     for s in range(1000)],
+            number=TICKS // 1000, repeat=5))
+
+        print("duration {:>5}s  per tick {:.3f} us  TimeLabel {:.3f} us  "
+              "({:.1f}x)".format(duration, slow / TICKS * 1e6,
+                                 fast / TICKS * 1e6, slow / fast))
+
+
+if __name__ == '__main__':
+    main()
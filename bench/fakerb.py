@@ -0,0 +1,436 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+"""
+a pure-Python stand-in for the parts of Rhythmbox the plugin talks to - the
+shell, shell player, database entries, display page model and the widget
+trees of its sources - built on the stand-in gi modules of tests/fakegi.
+
+build_shell makes a shell with any number of sources and entries.
+"""
+
+import os
+import random
+import sys
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, 'tests'))
+import fakegi  # noqa: E402
+from fakegi import Container, Object, Widget  # noqa: E402
+from gi.repository import Gtk  # noqa: E402
+from gi.repository import RB  # noqa: E402
+
+Props = types.SimpleNamespace
+
+
+class TreeStore(Object):
+    """
+    Gtk.TreeStore - iters and paths are both tuples of row indices so
+    they stay valid for as long as no row is removed. Row references
+    follow their row
+    """
+
+    def __init__(self):
+        super().__init__()
+        # each row is [values, child rows]
+        self._rows = []
+        # number of rows removed - row references look up their path
+        # again once it changes
+        self.removals = 0
+
+    @classmethod
+    def new(cls, types):
+        return cls()
+
+    def filter_new(self, root=None):
+        return self
+
+    def set_visible_column(self, column):
+        pass
+
+    def refilter(self):
+        pass
+
+    def _row(self, treeiter):
+        rows = self._rows
+        for index in treeiter[:-1]:
+            rows = rows[index][1]
+        return rows[treeiter[-1]]
+
+    def _siblings(self, treeiter):
+        if treeiter is None:
+            return self._rows
+        return self._row(treeiter)[1]
+
+    def append(self, parent_iter, values=None):
+        siblings = self._siblings(parent_iter)
+        siblings.append([list(values or []), []])
+        treeiter = (parent_iter or ()) + (len(siblings) - 1,)
+        self.emit('row-inserted', treeiter, treeiter)
+        return treeiter
+
+    def remove(self, treeiter):
+        del self._siblings(treeiter[:-1] or None)[treeiter[-1]]
+        self.removals += 1
+        self.emit('row-deleted', treeiter)
+        return False
+
+    def _find_row(self, row, rows=None, path=()):
+        """ :return: path of row or None once it has been removed """
+        for index, (values, children) in enumerate(
+                self._rows if rows is None else rows):
+            if children is row[1]:
+                return path + (index,)
+            found = self._find_row(row, children, path + (index,))
+            if found is not None:
+                return found
+        return None
+
+    def __getitem__(self, treeiter):
+        return self._row(treeiter)[0]
+
+    def __setitem__(self, treeiter, values):
+        self._row(treeiter)[0] = list(values)
+
+    def get_iter_first(self):
+        return (0,) if self._rows else None
+
+    def iter_next(self, treeiter):
+        following = treeiter[:-1] + (treeiter[-1] + 1,)
+        if following[-1] < len(self._siblings(treeiter[:-1] or None)):
+            return following
+        return None
+
+    def iter_has_child(self, treeiter):
+        return bool(self._row(treeiter)[1])
+
+    def iter_children(self, treeiter):
+        return treeiter + (0,) if self.iter_has_child(treeiter) else None
+
+    def iter_parent(self, treeiter):
+        return treeiter[:-1] or None
+
+    def get_path(self, treeiter):
+        return treeiter
+
+    def get_iter(self, path):
+        return tuple(path)
+
+
+class TreeRowReference(object):
+
+    def __init__(self, model, path):
+        self._model = model
+        self._row = model._row(path)
+        self._path = tuple(path)
+        self._removals = model.removals
+
+    @classmethod
+    def new(cls, model, path):
+        return cls(model, path)
+
+    def valid(self):
+        return self.get_path() is not None
+
+    def get_path(self):
+        if self._removals != self._model.removals:
+            self._path = self._model._find_row(self._row)
+            self._removals = self._model.removals
+        return self._path
+
+
+class DisplayPageModel(TreeStore):
+    """
+    RB.DisplayPageModel - column 1 of each row is the page
+    """
+
+    def add_page(self, page, parent_iter=None):
+        treeiter = self.append(parent_iter, [None, page])
+        self.emit('page-inserted', page, treeiter)
+        return treeiter
+
+    def _walk(self, rows, path):
+        for index, (values, children) in enumerate(rows):
+            yield path + (index,), values
+            yield from self._walk(children, path + (index,))
+
+    def find_page(self, page):
+        for treeiter, values in self._walk(self._rows, ()):
+            if values[1] is page:
+                return True, treeiter
+        return False, None
+
+
+class Column(Object):
+    """ Gtk.TreeViewColumn """
+
+    def __init__(self, title, width):
+        super().__init__()
+        self.props = Props(title=title)
+        self._width = width
+
+    def get_width(self):
+        return self._width
+
+    def set_fixed_width(self, width):
+        self._width = width
+
+    def get_expand(self):
+        return False
+
+    def get_sizing(self):
+        return Gtk.TreeViewColumnSizing.FIXED
+
+    def set_reorderable(self, reorderable):
+        pass
+
+
+class TreeView(Container):
+
+    def __init__(self, columns):
+        super().__init__('GtkTreeView')
+        self.columns = columns
+        self.moves = 0
+
+    def get_columns(self):
+        return list(self.columns)
+
+    def move_column_after(self, column, base):
+        self.moves += 1
+        self.columns.remove(column)
+        self.columns.insert(self.columns.index(base) + 1 if base else 0,
+                            column)
+        self.emit('columns-changed')
+
+
+class EntryView(Container):
+
+    def get_child(self):
+        # as in RB v3.4.3 and later the tree view has to be searched for
+        raise AttributeError('get_child')
+
+
+class Source(Container, RB.DisplayPage):
+    """
+    an RBSource with the widget tree Rhythmbox builds for it - toolbar,
+    browser, entry view and filler widgets. A source built without
+    widgets only has its entry view and filler, as some plugin sources do
+    """
+
+    def __init__(self, name, titles, filler=40, browser=True, widgets=True):
+        Container.__init__(self, 'RBSource')
+        self.props = Props(name=name, visibility=True)
+        if browser:
+            self.props.show_browser = True
+
+        top = self.pack(Container('GtkBox'))
+        if widgets:
+            toolbar = top.pack(Container('RBSourceToolbar'))
+            for i in range(3):
+                toolbar.pack(Widget('GtkButton'))
+            if browser:
+                toolbar.pack(Widget('GtkToggleButton', label='Browse'))
+            paned = top.pack(Container('GtkPaned'))
+            if browser:
+                paned.pack(Container('RBPropertyView'))
+
+            top = paned.pack(Container('GtkGrid'))
+            top.props = Props(margin_top=6)
+
+        self.entry_view = top.pack(EntryView('RBEntryView'))
+        scrolled = self.entry_view.pack(Container('GtkScrolledWindow'))
+        # the first column - the playing indicator - has no title
+        scrolled.pack(TreeView([Column(None, 20)] +
+                               [Column(title, 100 + 10 * i)
+                                for i, title in enumerate(titles)]))
+
+        # the rest of the page - buttons, labels, info bars
+        box = self.pack(Container('GtkBox'))
+        for i in range(filler):
+            box.pack(Widget('GtkLabel' if i % 2 else 'GtkButton'))
+
+    def get_entry_view(self):
+        return self.entry_view
+
+
+# the column titles of an entry view
+TITLES = ['Track', 'Title', 'Genre', 'Artist', 'Album', 'Year', 'Time',
+          'Quality', 'Rating', 'Play Count', 'Last Played', 'Date Added',
+          'Comment', 'BPM', 'Location']
+
+# source types - each type shares one remembered column layout
+SOURCE_TYPES = [type(name, (Source,), {}) for name in (
+    'RBLibrarySource', 'RBStaticPlaylistSource', 'RBAutoPlaylistSource',
+    'RBPodcastSource', 'RBIRadioSource', 'RBGenericPlayerSource')]
+
+
+class ExtDBKey(object):
+
+    def __init__(self, album):
+        self._album = album
+
+    def to_string(self):
+        return "album\0" + self._album
+
+
+class Entry(object):
+    """ RhythmDB entry """
+
+    def __init__(self, entry_id, title, artist, album, genre, year,
+                 duration):
+        self._strings = {RB.RhythmDBPropType.TITLE: title,
+                         RB.RhythmDBPropType.ARTIST: artist,
+                         RB.RhythmDBPropType.ALBUM: album,
+                         RB.RhythmDBPropType.GENRE: genre}
+        self._ulongs = {RB.RhythmDBPropType.ENTRY_ID: entry_id,
+                        RB.RhythmDBPropType.DATE: year,
+                        RB.RhythmDBPropType.DURATION: duration}
+
+    def get_string(self, prop):
+        return self._strings.get(prop)
+
+    def get_ulong(self, prop):
+        return self._ulongs.get(prop, 0)
+
+    def create_ext_db_key(self, prop):
+        return ExtDBKey(self._strings[RB.RhythmDBPropType.ALBUM])
+
+
+class RhythmDB(Object):
+
+    def __init__(self, entries):
+        super().__init__()
+        self.entries = entries
+
+    def entry_request_extra_metadata(self, entry, prop):
+        return None
+
+
+class ExtDB(Object):
+    """ RB.ExtDB - requests are answered later, if at all """
+
+    def __init__(self):
+        super().__init__()
+        self.requests = 0
+
+    def request(self, key, callback, *args):
+        self.requests += 1
+
+
+class QueryModel(object):
+    """ RhythmDBQueryModel of a source or of the play queue """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self._index = dict((id(entry), i) for i, entry in enumerate(entries))
+
+    def get_iter_first(self):
+        return 0 if self.entries else None
+
+    def iter_to_entry(self, treeiter):
+        return self.entries[treeiter]
+
+    def get_next_from_entry(self, entry):
+        i = self._index.get(id(entry))
+        if i is None or i + 1 >= len(self.entries):
+            return None
+        return self.entries[i + 1]
+
+
+class ShellPlayer(Object):
+
+    def __init__(self, source=None):
+        super().__init__()
+        self.props = Props(play_order='linear')
+        self.source = source
+        self.entry = None
+        self.elapsed = 0
+        self.seeks = []
+
+    def get_playing_entry(self):
+        return self.entry
+
+    def get_playing_time(self):
+        return True, self.elapsed
+
+    def set_playing_time(self, seconds):
+        self.seeks.append(seconds)
+
+    def get_playing_source(self):
+        return self.source
+
+
+def build_entries(count, seed=0):
+    """
+    :return: list of count entries - about twelve per album
+    """
+    rng = random.Random(seed)
+    entries = []
+    for entry_id in range(count):
+        album = entry_id // 12
+        entries.append(Entry(
+            entry_id, "Song {} & more".format(entry_id),
+            "Artist {}".format(album // 3), "Album <{}>".format(album),
+            rng.choice(['Rock', 'Jazz', 'Folk', 'Classical']),
+            730000 + rng.randint(0, 15000), rng.randint(60, 5400)))
+    return entries
+
+
+def build_shell(sources=300, entries=10000, filler=40, seed=0):
+    """
+    a shell whose display page model holds sources of mixed types, each
+    with a shuffled entry view column order. One source in eight has no
+    toolbar, browser or grid
+    """
+    rng = random.Random(seed)
+    model = DisplayPageModel()
+    pages = []
+    for i in range(sources):
+        source_type = SOURCE_TYPES[i % len(SOURCE_TYPES)]
+        titles = rng.sample(TITLES, rng.randint(6, len(TITLES)))
+        page = source_type("{} {}".format(source_type.__name__, i), titles,
+                           filler=filler, browser=i % 3 != 2,
+                           widgets=i % 8 != 7)
+        model.add_page(page)
+        pages.append(page)
+
+    db = RhythmDB(build_entries(entries, seed))
+    library = Object()
+    library.props = Props(query_model=QueryModel(db.entries))
+
+    display_page_tree = Object()
+    display_page_tree.props = Props(model=model)
+
+    queue_source = Object()
+    queue_source.props = Props(query_model=QueryModel([]))
+
+    shell = Object()
+    shell.props = Props(display_page_model=model,
+                        display_page_tree=display_page_tree,
+                        queue_source=queue_source,
+                        shell_player=ShellPlayer(library),
+                        db=db,
+                        selected_page=pages[0] if pages else None,
+                        window=fakegi.Window('GtkWindow'))
+    shell.pages = pages
+    return shell
+
+
+Gtk.TreeStore = TreeStore
+Gtk.TreeRowReference = TreeRowReference
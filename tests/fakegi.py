@@ -0,0 +1,369 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+"""
+The plugin modules import gi.repository at module level - the tests and
+benchmarks run without Rhythmbox or GTK installed so importing this
+module puts stand-in gi modules into sys.modules. It must be imported
+before any plugin module.
+
+Anything not defined here resolves to a placeholder class so that module
+level references such as RB.RhythmDBPropType.TITLE can be evaluated.
+The widget classes are small pure-Python models of the GTK behaviour the
+plugin relies on.
+"""
+
+import ast
+import os
+import sys
+import types
+import xml.etree.ElementTree as ET
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+class _Placeholder(type):
+    """ metaclass giving a placeholder class for any unknown attribute """
+
+    def __getattr__(cls, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+
+        placeholder = _placeholder(attr)
+        setattr(cls, attr, placeholder)
+        return placeholder
+
+
+class _Anything(object, metaclass=_Placeholder):
+    """ instances accept any arguments and have any attribute """
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __call__(self, *args, **kwargs):
+        return _Anything()
+
+    def __getattr__(self, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+
+        return _Anything()
+
+
+def _placeholder(name):
+    return _Placeholder(name, (_Anything,), {})
+
+
+class _Module(types.ModuleType):
+    """ a gi.repository module giving a placeholder for anything unknown """
+
+    def __getattr__(self, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+
+        placeholder = _placeholder(attr)
+        setattr(self, attr, placeholder)
+        return placeholder
+
+
+class Object(object):
+    """ GObject.Object with just enough signal support for the tests """
+
+    def __init__(self):
+        self._handlers = {}
+        self._next_id = 0
+
+    def connect(self, signal, callback, *args):
+        self._next_id += 1
+        self._handlers[self._next_id] = (signal, callback, args)
+        return self._next_id
+
+    def disconnect(self, handler_id):
+        del self._handlers[handler_id]
+
+    def handler_count(self, signal=None):
+        return len([h for h in self._handlers.values()
+                    if signal is None or h[0] == signal])
+
+    def emit(self, signal, *params):
+        for name, callback, args in list(self._handlers.values()):
+            if name == signal:
+                callback(self, *(params + args))
+
+
+class Buildable(object):
+
+    @staticmethod
+    def get_name(node):
+        return node.buildable_id
+
+
+class Widget(Object, Buildable):
+
+    def __init__(self, name='GtkWidget', buildable_id=None, label=None):
+        super().__init__()
+        self.name = name
+        self.buildable_id = buildable_id
+        self.label = label
+        self.parent = None
+
+    def get_name(self):
+        return self.name
+
+    def get_label(self):
+        return self.label
+
+    def get_child(self):
+        return None
+
+    def get_parent(self):
+        return self.parent
+
+    def is_toplevel(self):
+        return False
+
+    def is_ancestor(self, ancestor):
+        parent = self.parent
+        while parent is not None:
+            if parent is ancestor:
+                return True
+            parent = parent.parent
+
+        return False
+
+    def destroy(self):
+        self.emit('destroy')
+
+    def realize(self):
+        self.realized = True
+
+    def get_realized(self):
+        return getattr(self, 'realized', False)
+
+    def set_visible(self, visible):
+        self.visible = visible
+
+    def get_visible(self):
+        return getattr(self, 'visible', False)
+
+    def show(self):
+        self.visible = True
+
+    def hide(self):
+        self.visible = False
+
+    def set_orientation(self, orientation):
+        self.orientation = orientation
+
+    def set_sensitive(self, sensitive):
+        self.sensitive = sensitive
+
+
+class Container(Widget):
+    """
+    children are added without emitting 'add' - as gtk_box_pack_start,
+    gtk_grid_attach and friends do
+    """
+
+    def __init__(self, name='GtkContainer', buildable_id=None, label=None):
+        super().__init__(name, buildable_id, label)
+        self.children = []
+
+    def pack(self, child, position=None):
+        if position is None:
+            self.children.append(child)
+        else:
+            self.children.insert(position, child)
+        child.parent = self
+        return child
+
+    def remove(self, child):
+        self.children.remove(child)
+        child.parent = None
+        self.emit('remove', child)
+
+    def get_children(self):
+        return list(self.children)
+
+    def pack_start(self, child, expand, fill, padding):
+        self.pack(child)
+
+    def __iter__(self):
+        return iter(self.get_children())
+
+
+class Label(Widget):
+
+    def __init__(self, label=None):
+        super().__init__('GtkLabel', label=label)
+        self.markups = 0
+
+    def set_label(self, label):
+        self.label = label
+
+    def set_markup(self, markup):
+        self.markups += 1
+        self.label = markup
+
+    def set_ellipsize(self, mode):
+        pass
+
+
+class ToggleButton(Widget):
+
+    def __init__(self, label=None):
+        super().__init__('GtkToggleButton', label=label)
+        self.active = False
+
+    def set_label(self, label):
+        self.label = label
+
+    def get_active(self):
+        return self.active
+
+    def set_active(self, active):
+        self.active = active
+
+
+class Window(Container):
+
+    def is_toplevel(self):
+        return True
+
+
+class Settings(Object):
+    """
+    Gio.Settings holding the defaults of the plugin schema - changes are
+    kept in memory only
+    """
+
+    SCHEMA = os.path.join(ROOT, 'schema', 'org.gnome.rhythmbox.plugins.'
+                          'alternative_toolbar.gschema.xml')
+
+    def __init__(self, path):
+        super().__init__()
+        self._values = {}
+        for key in ET.parse(self.SCHEMA).getroot().iter('key'):
+            default = key.find('default').text
+            if key.get('type') == 'b':
+                value = default == 'true'
+            else:
+                value = ast.literal_eval(default)
+            self._values[key.get('name')] = value
+
+    @classmethod
+    def new(cls, path):
+        return cls(path)
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __setitem__(self, key, value):
+        self._values[key] = value
+        self.emit('changed::' + key, key)
+
+    def bind(self, key, obj, prop, flags):
+        pass
+
+
+class MainLoop(object):
+    """
+    GLib timeout and idle sources - nothing runs until the test calls
+    run_pending
+    """
+
+    def __init__(self):
+        self.sources = {}
+        self._next_id = 0
+
+    def timeout_add(self, interval, callback, *args, **kwargs):
+        self._next_id += 1
+        self.sources[self._next_id] = (callback, args)
+        return self._next_id
+
+    def idle_add(self, callback, *args, **kwargs):
+        return self.timeout_add(0, callback, *args)
+
+    def source_remove(self, source_id):
+        del self.sources[source_id]
+
+    def run_pending(self):
+        """ dispatch every source pending now - once """
+        for source_id, (callback, args) in list(self.sources.items()):
+            if source_id in self.sources and not callback(*args):
+                self.sources.pop(source_id, None)
+
+
+main_loop = MainLoop()
+
+
+def _install():
+    try:
+        import gi  # noqa: F401
+        return
+    except ImportError:
+        pass
+
+    gi = types.ModuleType('gi')
+    gi.require_version = lambda namespace, version: None
+    repository = types.ModuleType('gi.repository')
+    gi.repository = repository
+    sys.modules['gi'] = gi
+    sys.modules['gi.repository'] = repository
+
+    for name in ('GLib', 'GObject', 'Gdk', 'GdkPixbuf', 'Gio', 'Gtk', 'Pango',
+                 'Peas', 'PeasGtk', 'RB'):
+        module = _Module('gi.repository.' + name)
+        setattr(repository, name, module)
+        sys.modules['gi.repository.' + name] = module
+
+    repository.GObject.Object = Object
+    repository.Gtk.Buildable = Buildable
+    repository.Gtk.Widget = Widget
+    repository.Gtk.Container = Container
+    repository.Gtk.Window = Window
+    repository.Gtk.Label = Label
+
+    repository.Gio.Settings = Settings
+
+    repository.GLib.Error = Exception
+    repository.GLib.markup_escape_text = lambda text: text.replace(
+        '&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    repository.GLib.timeout_add = main_loop.timeout_add
+    repository.GLib.idle_add = main_loop.idle_add
+    repository.GLib.source_remove = main_loop.source_remove
+    repository.GLib.timeout_add_seconds = \
+        lambda interval, callback, *args: main_loop.timeout_add(
+            interval * 1000, callback, *args)
+    repository.Gdk.threads_add_timeout = \
+        lambda priority, interval, callback, *args: main_loop.timeout_add(
+            interval, callback, *args)
+    repository.GLib.get_language_names = lambda: ['en_US', 'en', 'C']
+    repository.GLib.PRIORITY_DEFAULT = 0
+    repository.GLib.PRIORITY_HIGH_IDLE = 100
+    repository.GLib.PRIORITY_DEFAULT_IDLE = 200
+    repository.GLib.PRIORITY_LOW = 300
+
+    repository.Pango.parse_markup = lambda markup, length, accel: None
+
+    rb = types.ModuleType('rb')
+    sys.modules.setdefault('rb', rb)
+
+
+_install()
@@ -0,0 +1,57 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, 'bench'))
+import bench_plugin  # noqa: E402
+
+
+def test_benchmarks_run():
+    results = bench_plugin.run(sources=24, entries=300, ticks=200, songs=50,
+                               filler=10)
+
+    # selecting a page again finds everything in the page anatomy
+    assert results['page change - first visit'][2] > 0
+    assert results['page change - revisit'][2] == 0
+    assert results['column moves'][2] > 0
+    assert results['page change (compact) - first visit'][2] > 0
+    assert results['page change (compact) - revisit'][2] == 0
+
+    # the headerbar still looks for the buttons and search entry of each
+    # source toolbar on a revisit - but not for the widgets of the page
+    assert 0 < results['page change (headerbar) - revisit'][2] < \
+        results['page change (headerbar) - first visit'][2]
+
+    # one walk per root finds what several searches did - widgets missing
+    # from a page are looked for in one walk rather than one each
+    assert results['headerbar searches - find_many'][2] * 3 < \
+        results['headerbar searches - find'][2] * 2
+
+    # the time label changes every second
+    assert results['elapsed tick'][2] == 200
+
+    # each song change requests its cover and prefetches the next one,
+    # refreshing the label of the same song sets nothing
+    assert results['song change'][2] == 100
+    assert results['same song refresh'][2] == 0
+
+    assert results['sidebar population'][2] == 24
+    assert results['column store read'][2] == 24
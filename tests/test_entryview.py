@@ -0,0 +1,206 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+import json
+import os
+import random
+
+import alttoolbar_entryview
+from alttoolbar_entryview import ColumnStore
+from alttoolbar_entryview import plan_column_moves
+from fakegi import main_loop
+
+XML_V1 = """<?xml version='1.0' encoding='us-ascii'?>
+<root>
+ <database>1</database>
+ <pages>
+  <page name="RBLibrarySource">'Title','Artist','Album'</page>
+  <RBLibrarySource column="Title" width="200"/>
+  <RBLibrarySource column="PlayCount" width="60"/>
+ </pages>
+</root>
+"""
+
+
+def test_layout_changes_with_order_and_widths(tmp_path):
+    store = ColumnStore(str(tmp_path))
+    assert store.get_layout('RBStaticPlaylistSource') is None
+
+    store.set_columns('RBStaticPlaylistSource', ['Title', 'Artist'],
+                      {'Title': 200, 'Artist': 100})
+    layout = store.get_layout('RBStaticPlaylistSource')
+    assert layout == store.get_layout('RBStaticPlaylistSource')
+
+    store.set_columns('RBStaticPlaylistSource', ['Artist', 'Title'],
+                      {'Title': 200, 'Artist': 100})
+    moved = store.get_layout('RBStaticPlaylistSource')
+    assert moved != layout
+
+    store.set_columns('RBStaticPlaylistSource', ['Artist', 'Title'],
+                      {'Title': 250, 'Artist': 100})
+    assert store.get_layout('RBStaticPlaylistSource') != moved
+    store.flush()
+
+
+def test_version_1_xml_is_migrated_and_left_alone(tmp_path):
+    xml = tmp_path / 'entryview_db.xml'
+    xml.write_text(XML_V1)
+
+    store = ColumnStore(str(tmp_path))
+    assert store.get_order('RBLibrarySource') == ['Title', 'Artist', 'Album']
+    assert store.get_width('RBLibrarySource', 'Title') == 200
+    assert store.get_width('RBLibrarySource', 'Play Count') == 60
+
+    # the migrated columns are written straight away
+    assert (tmp_path / 'entryview_db.json').exists()
+    assert xml.read_text() == XML_V1
+
+    reread = ColumnStore(str(tmp_path))
+    assert reread.get_layout('RBLibrarySource') == \
+        store.get_layout('RBLibrarySource')
+
+
+def test_unreadable_stores_are_ignored(tmp_path):
+    store_file = tmp_path / 'entryview_db.json'
+    for content in ('{"version": 2, "pages": {"RBLib',
+                    json.dumps({'version': 3, 'pages': {
+                        'RBLibrarySource': {'order': ['Title'],
+                                            'widths': {}}}})):
+        store_file.write_text(content)
+
+        store = ColumnStore(str(tmp_path))
+        assert store.get_order('RBLibrarySource') is None
+
+        # the next change replaces the file
+        store.set_columns('RBLibrarySource', ['Artist'], {'Artist': 90})
+        store.flush()
+        assert ColumnStore(str(tmp_path)).get_order('RBLibrarySource') == \
+            ['Artist']
+
+
+def test_changes_are_written_once_quiet(tmp_path, monkeypatch):
+    main_loop.sources.clear()
+    writes = []
+    replace = os.replace
+
+    def counted(source, destination):
+        writes.append(source)
+        replace(source, destination)
+
+    monkeypatch.setattr(alttoolbar_entryview.os, 'replace', counted)
+
+    store = ColumnStore(str(tmp_path))
+    for width in range(100, 110):
+        store.set_columns('RBLibrarySource', ['Title', 'Artist'],
+                          {'Title': width, 'Artist': 100})
+    # each change restarts the quiet period
+    assert len(main_loop.sources) == 1
+    assert writes == []
+
+    # the quiet period ends, then the write waits for an idle moment
+    main_loop.run_pending()
+    assert writes == []
+    main_loop.run_pending()
+    assert len(writes) == 1
+    assert main_loop.sources == {}
+
+    assert ColumnStore(str(tmp_path)).get_width('RBLibrarySource',
+                                                'Title') == 109
+
+
+def test_flush_replaces_the_store_with_a_complete_file(tmp_path,
+                                                       monkeypatch):
+    main_loop.sources.clear()
+    replaced = []
+    replace = os.replace
+
+    def checked(source, destination):
+        # the whole new store is in a temporary file next to the store
+        with open(source) as f:
+            assert json.load(f)['pages']['RBLibrarySource']['order'] == \
+                ['Title']
+        replaced.append((os.path.dirname(source), destination))
+        replace(source, destination)
+
+    monkeypatch.setattr(alttoolbar_entryview.os, 'replace', checked)
+
+    store = ColumnStore(str(tmp_path))
+    store.set_columns('RBLibrarySource', ['Title'], {'Title': 200})
+    store.flush()
+    assert replaced == [(str(tmp_path),
+                         str(tmp_path / 'entryview_db.json'))]
+    assert main_loop.sources == {}
+    assert os.listdir(str(tmp_path)) == ['entryview_db.json']
+
+    # nothing has changed since
+    store.flush()
+    assert len(replaced) == 1
+
+
+def apply_moves(current, moves):
+    """ move the columns as TreeView.move_column_after would """
+    columns = list(current)
+    for title, after in moves:
+        columns.remove(title)
+        columns.insert(columns.index(after) + 1 if after is not None else 0,
+                       title)
+
+    return columns
+
+
+def longest_increasing(sequence):
+    """ length of the longest increasing subsequence - O(n^2) reference """
+    lengths = []
+    for i, value in enumerate(sequence):
+        lengths.append(1 + max([lengths[j] for j in range(i)
+                                if sequence[j] < value] or [0]))
+
+    return max(lengths or [0])
+
+
+def test_moves_reach_the_remembered_order():
+    rng = random.Random(1)
+    titles = ['Title', 'Artist', 'Album', 'Genre', 'Time', 'Year', 'Track',
+              'Rating', 'Play Count', 'Last Played', 'Date Added', 'BPM']
+
+    for _ in range(500):
+        current = rng.sample(titles, rng.randint(0, len(titles)))
+        remembered = rng.sample(titles, rng.randint(0, len(titles)))
+
+        moves = plan_column_moves(current, remembered)
+
+        wanted = [title for title in remembered if title in current]
+        wanted += [title for title in current if title not in wanted]
+        assert apply_moves(current, moves) == wanted
+
+        # every column outside one longest run already in order moves once
+        position = dict((title, i) for i, title in enumerate(wanted))
+        assert len(moves) == len(current) - longest_increasing(
+            [position[title] for title in current])
+
+
+def test_no_moves_when_already_in_order():
+    current = ['Title', 'Artist', 'Album', 'Time']
+    assert plan_column_moves(current, current) == []
+    assert plan_column_moves(current, ['Title', 'Artist']) == []
+
+
+def test_single_column_moved_once():
+    current = ['Title', 'Artist', 'Album', 'Time']
+    remembered = ['Time', 'Title', 'Artist', 'Album']
+    assert plan_column_moves(current, remembered) == [('Time', None)]
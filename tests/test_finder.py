@@ -0,0 +1,96 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+import pytest
+from alttoolbar_finder import WidgetFinder
+from gi.repository import Gtk
+
+
+@pytest.fixture
+def finder():
+    finder = WidgetFinder()
+    finder.clear()
+    yield finder
+    finder.clear()
+
+
+def page():
+    root = Gtk.Container('RBSource')
+    box = root.pack(Gtk.Container('GtkBox'))
+    box.pack(Gtk.Widget('GtkLabel'))
+    return root, box
+
+
+def test_hit_is_remembered(finder):
+    root, box = page()
+    tree = box.pack(Gtk.Widget('GtkTreeView'))
+
+    assert finder.find(root, 'GtkTreeView', 'by_name') is tree
+    traversed = finder.traversed
+    assert finder.find(root, 'GtkTreeView', 'by_name') is tree
+    assert finder.traversed == traversed
+
+
+def test_miss_is_not_remembered(finder):
+    root, box = page()
+
+    assert finder.find(root, 'GtkTreeView', 'by_name') is None
+
+    # packing does not emit 'add' - the next search must still find it
+    tree = box.pack(Gtk.Widget('GtkTreeView'))
+    assert finder.find(root, 'GtkTreeView', 'by_name') is tree
+
+
+def test_hit_moved_out_of_root_is_searched_again(finder):
+    root, box = page()
+    old = box.pack(Gtk.Widget('GtkTreeView'))
+    assert finder.find(root, 'GtkTreeView', 'by_name') is old
+
+    box.children.remove(old)
+    old.parent = Gtk.Container('GtkBox')
+    new = box.pack(Gtk.Widget('GtkTreeView'))
+    assert finder.find(root, 'GtkTreeView', 'by_name') is new
+
+
+def test_hit_that_no_longer_matches_is_searched_again(finder):
+    root, box = page()
+    button = box.pack(Gtk.Widget('GtkButton', label='Browse'))
+    assert finder.find(root, 'GtkButton', 'by_name', 'Browse') is button
+
+    button.label = 'Search'
+    assert finder.find(root, 'GtkButton', 'by_name', 'Browse') is None
+
+
+def test_toplevel_searches_are_not_remembered(finder):
+    window = Gtk.Window('GtkWindow')
+    toolbar = window.pack(Gtk.Container('GtkBox', 'main-toolbar'))
+
+    assert finder.find(window, 'main-toolbar', 'by_id') is toolbar
+    assert finder._index == {}
+    assert window.handler_count() == 0
+
+
+def test_destroying_the_root_forgets_it(finder):
+    root, box = page()
+    box.pack(Gtk.Widget('GtkTreeView'))
+    finder.find(root, 'GtkTreeView', 'by_name')
+    assert root.handler_count('destroy') == 1
+
+    root.destroy()
+    assert finder._index == {}
+    assert root.handler_count() == 0
@@ -0,0 +1,119 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+import os
+import sys
+import time
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, 'bench'))
+import bench_plugin  # noqa: E402
+from alttoolbar_coverart import CoverArtCache  # noqa: E402
+from alttoolbar_entryview import ColumnStore  # noqa: E402
+from alttoolbar_instrument import Instrumentation  # noqa: E402
+from fakegi import Object, main_loop  # noqa: E402
+
+
+@pytest.fixture
+def instrumentation():
+    instrumentation = Instrumentation()
+    instrumentation.reset()
+    instrumentation.enabled = True
+    main_loop.sources.clear()
+    yield instrumentation
+    main_loop.sources.clear()
+    instrumentation.reset()
+
+
+class Pixbuf(object):
+
+    def __init__(self, size):
+        self.size = size
+
+    def scale_simple(self, width, height, interp):
+        return Pixbuf(width)
+
+    def get_rowstride(self):
+        return self.size * 4
+
+    def get_height(self):
+        return self.size
+
+
+def plugin():
+    """ the state the page and song property changes work with """
+    toolbar = types.SimpleNamespace(suspended=False,
+                                    reset_categories_pos=lambda page: None,
+                                    reset_toolbar=lambda page: None,
+                                    reset_entryview=lambda page: None,
+                                    display_song=lambda entry: None)
+    player = Object()
+    player.get_playing = lambda: True
+    player.get_playing_entry = lambda: object()
+
+    plugin = Object()
+    plugin.toolbar_type = toolbar
+    plugin.shell_player = player
+    plugin._page_change_page = None
+    plugin._page_change_id = None
+    plugin._song_property_change_id = None
+    plugin._process_page_change = types.MethodType(
+        bench_plugin.Plugin._process_page_change, plugin)
+    plugin._process_song_property_change = types.MethodType(
+        bench_plugin.Plugin._process_song_property_change, plugin)
+    return plugin
+
+
+def test_deferred_callbacks_are_reported(instrumentation, tmp_path):
+    changer = plugin()
+    for page in range(3):
+        bench_plugin.Plugin.on_page_change(changer, None, Object())
+    for property in ('artist', 'album', 'title'):
+        bench_plugin.Plugin._sh_on_song_property_changed(
+            changer, changer.shell_player, 'uri', property, '', 'new')
+
+    store = ColumnStore(str(tmp_path))
+    store.set_columns('RBLibrarySource', ['Title'], {'Title': 200})
+
+    delivered = []
+    CoverArtCache().submit('album', Pixbuf(600), 48, delivered.append)
+
+    # the quiet period of the column store ends, then it is written - the
+    # scaled cover is delivered once the worker thread is done
+    deadline = time.monotonic() + 10
+    while main_loop.sources or not delivered:
+        assert time.monotonic() < deadline
+        main_loop.run_pending()
+        time.sleep(0.001)
+
+    report = instrumentation.report()
+    for name in ('AltToolbarPlugin._process_page_change',
+                 'AltToolbarPlugin._process_song_property_change',
+                 'ColumnStore._on_quiet',
+                 'ColumnStore._on_idle',
+                 'CoverArtCache.__impl._deliver'):
+        assert name in report
+
+    # the page and song property changes were coalesced
+    assert instrumentation._stats[
+        'AltToolbarPlugin._process_page_change'][0] == 1
+    assert instrumentation._stats[
+        'AltToolbarPlugin._process_song_property_change'][0] == 1
@@ -0,0 +1,49 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+from alttoolbar_label import TimeLabel
+
+
+def per_tick_label(seconds, duration):
+    """ the label as it was formatted - both halves on every tick """
+    minutes, seconds = divmod(seconds, 60)
+    total_minutes, total_seconds = divmod(duration, 60)
+    hours, minutes = divmod(minutes, 60)
+    total_hours, total_minutes = divmod(total_minutes, 60)
+    if total_hours:
+        return "<small>{}:{:02}:{:02} / {}:{:02}:{:02}</small>".format(
+            hours, minutes, seconds, total_hours, total_minutes,
+            total_seconds)
+
+    return "<small>{:02}:{:02} / {:02}:{:02}</small>".format(
+        minutes, seconds, total_minutes, total_seconds)
+
+
+def test_same_as_formatting_every_tick():
+    label = TimeLabel()
+    for duration in (0, 1, 59, 60, 245, 3599, 3600, 3661, 36000):
+        label.set_duration(duration)
+        for seconds in range(0, duration + 1, max(1, duration // 97)):
+            assert label.format(seconds) == per_tick_label(seconds,
+                                                           duration)
+
+
+def test_short_and_long_songs():
+    assert TimeLabel(245).format(61) == "<small>01:01 / 04:05</small>"
+    assert TimeLabel(3661).format(61) == \
+        "<small>0:01:01 / 1:01:01</small>"
@@ -0,0 +1,195 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+import gc
+import weakref
+
+import alttoolbar_type
+from alttoolbar_finder import WidgetFinder
+from alttoolbar_page import PageAnatomy
+from alttoolbar_page import PageRegistries
+from fakegi import Object, main_loop
+from gi.repository import Gtk
+from gi.repository import RB
+
+
+class Page(Gtk.Container):
+
+    def __init__(self):
+        super().__init__('RBSource')
+        self.entry_view = None
+
+    def get_entry_view(self):
+        return self.entry_view
+
+
+class EntryView(Gtk.Container):
+
+    def get_child(self):
+        # as in RB v3.4.3 and later
+        raise AttributeError('get_child')
+
+
+def anatomy(page):
+    finder = WidgetFinder()
+    return PageAnatomy(page, finder.find, finder.find_many)
+
+
+def test_widgets_found_once_built():
+    page = Page()
+    record = anatomy(page)
+
+    assert record.source_toolbar is None
+    assert record.treeview is None
+
+    toolbar = page.pack(Gtk.Widget('RBSourceToolbar'))
+    page.entry_view = page.pack(EntryView('RBEntryView'))
+    tree = page.entry_view.pack(Gtk.Widget('GtkTreeView'))
+
+    assert record.source_toolbar is toolbar
+    assert record.entryview is page.entry_view
+    assert record.treeview is tree
+
+
+def test_found_widgets_are_kept():
+    page = Page()
+    toolbar = page.pack(Gtk.Widget('RBSourceToolbar'))
+    record = anatomy(page)
+
+    finder = WidgetFinder()
+    traversed = finder.traversed
+    assert record.source_toolbar is toolbar
+    assert finder.traversed == traversed
+
+
+def test_missing_widgets_of_realized_pages_are_remembered():
+    page = Page()
+    page.pack(Gtk.Container('GtkBox')).pack(Gtk.Widget('GtkLabel'))
+    page.realize()
+    record = anatomy(page)
+
+    finder = WidgetFinder()
+    traversed = finder.traversed
+    for i in range(3):
+        assert record.source_toolbar is None
+        assert record.propertyview is None
+        assert record.grid is None
+    assert finder.traversed == traversed
+
+
+def test_invalidate_looks_for_missing_widgets_again():
+    page = Page()
+    page.realize()
+    record = anatomy(page)
+    assert record.source_toolbar is None
+
+    toolbar = page.pack(Gtk.Widget('RBSourceToolbar'))
+    assert record.source_toolbar is None
+
+    record.invalidate()
+    assert record.source_toolbar is toolbar
+    assert record.grid is None
+
+
+def test_deleted_pages_are_evicted_and_freed():
+    finder = WidgetFinder()
+    finder.clear()
+    deleted = []
+
+    def on_deleted(page):
+        deleted.append(1)
+        finder.forget(page)
+
+    registries = PageRegistries(on_deleted)
+    anatomies = registries.new_registry()
+    processed = registries.new_registry()
+
+    alive = []
+    for i in range(1000):
+        page = Page()
+        page.pack(Gtk.Container('GtkBox')).pack(
+            Gtk.Widget('RBSourceToolbar'))
+        anatomies[page] = anatomy(page)
+        processed[page] = {}
+        alive.append(weakref.ref(page))
+        assert page.handler_count('deleted') == 1
+
+        page.emit('deleted')
+        assert page.handler_count() == 0
+        del page
+
+    gc.collect()
+    assert len(deleted) == 1000
+    assert len(anatomies) == 0 and len(processed) == 0
+    assert finder._index == {} and finder._roots == {}
+    assert not [ref for ref in alive if ref() is not None]
+
+
+def test_pending_column_moves_are_dropped_with_deleted_pages(monkeypatch,
+                                                             tmp_path):
+    monkeypatch.setattr(RB, 'user_cache_dir', lambda: str(tmp_path),
+                        raising=False)
+    finder = WidgetFinder()
+    finder.clear()
+    main_loop.sources.clear()
+
+    plugin = Object()
+    plugin.shell = Object()
+    plugin.find = finder.find
+    plugin.find_many = finder.find_many
+    plugin.forget = finder.forget
+    toolbar = alttoolbar_type.AltToolbarStandard()
+    toolbar.initialise(plugin)
+    main_loop.sources.clear()
+
+    alive = []
+    for i in range(1000):
+        page = Page()
+        page.entry_view = page.pack(EntryView('RBEntryView'))
+        page.entry_view.pack(Gtk.Widget('GtkTreeView'))
+
+        # the column moves wait on a short timeout
+        toolbar.reset_entryview(page)
+        assert len(main_loop.sources) == 1
+
+        alive.append(weakref.ref(page))
+        page.emit('deleted')
+        assert main_loop.sources == {}
+        del page
+
+    gc.collect()
+    assert len(toolbar._page_anatomy) == 0
+    assert len(toolbar._process_entryview) == 0
+    assert not [ref for ref in alive if ref() is not None]
+    toolbar.cleanup()
+
+
+def test_hidden_pages_stay_registered():
+    registries = PageRegistries()
+    registry = registries.new_registry()
+    page = Page()
+    registry[page] = 'end controls'
+    registry[page] = 'end controls again'
+    assert page.handler_count('deleted') == 1
+
+    # hiding a page does not delete it
+    page.emit('notify::visibility')
+    assert registry[page] == 'end controls again'
+
+    registries.cleanup()
+    assert page.handler_count() == 0
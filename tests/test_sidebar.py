@@ -0,0 +1,102 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, 'bench'))
+import bench_plugin  # noqa: E402
+import fakerb  # noqa: E402
+from alttoolbar_controller import AltControllerCategory  # noqa: E402
+from alttoolbar_sidebar import AltToolbarSidebar  # noqa: E402
+from fakegi import Object, main_loop  # noqa: E402
+
+
+@pytest.fixture
+def sidebar():
+    shell = fakerb.build_shell(sources=50, entries=10, filler=0)
+    controller = bench_plugin.Controller(AltControllerCategory.LOCAL)
+
+    toolbar = Object()
+    toolbar.shell = shell
+    toolbar.plugin = None
+    toolbar.is_controlled = lambda source: (True, controller)
+
+    main_loop.sources.clear()
+    sidebar = AltToolbarSidebar(toolbar, None)
+    sidebar.expanders = '{1:True}'
+    main_loop.run_pending()
+    yield sidebar
+    sidebar.cleanup()
+    main_loop.sources.clear()
+
+
+@pytest.fixture
+def checks(monkeypatch, sidebar):
+    """ the display page model row references checked """
+    checked = []
+    valid = fakerb.TreeRowReference.valid
+    model = sidebar.shell.props.display_page_model
+
+    def counted(reference):
+        if reference._model is model:
+            checked.append(reference)
+        return valid(reference)
+
+    monkeypatch.setattr(fakerb.TreeRowReference, 'valid', counted)
+    return checked
+
+
+def hide(shell, page):
+    model = shell.props.display_page_model
+    found, treeiter = model.find_page(page)
+    page.props.visibility = False
+    model.remove(treeiter)
+
+
+def test_hidden_page_is_found_by_its_path(sidebar, checks):
+    shell = sidebar.shell
+    page = shell.pages[-1]
+    assert page in sidebar._rows
+
+    hide(shell, page)
+    assert page not in sidebar._rows
+    assert len(sidebar._rows) == 49
+    assert len(checks) == 1
+
+
+def test_hidden_pages_are_found_once_paths_shift(sidebar, checks):
+    shell = sidebar.shell
+    for page in shell.pages[10:20]:
+        hide(shell, page)
+
+    assert not [page for page in shell.pages[10:20]
+                if page in sidebar._rows]
+    assert len(sidebar._rows) == 40
+
+    # the pages after the first hidden one moved up, each is looked for
+    # by its old path and the rows are checked again at most once
+    del checks[:]
+    hide(shell, shell.pages[30])
+    hide(shell, shell.pages[31])
+    assert shell.pages[30] not in sidebar._rows
+    assert shell.pages[31] not in sidebar._rows
+    assert len(checks) <= 1 + 40 + 1
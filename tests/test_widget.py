@@ -0,0 +1,137 @@
+# -*- Mode: python; coding: utf-8; tab-width: 4; indent-tabs-mode: nil; -*-
+#
+# Copyright (C) 2015 - 2020 David Mohammed <fossfreedom@ubuntu.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301  USA.
+
+from alttoolbar_widget import SeekThrottle
+
+
+class Player(object):
+    """ a ShellPlayer recording set_playing_time calls """
+
+    def __init__(self):
+        self.seeks = []
+
+    def set_playing_time(self, seconds):
+        self.seeks.append(seconds)
+
+
+class Clock(object):
+    """ monotonic clock and GLib timeouts advanced by the test """
+
+    def __init__(self):
+        self.now = 0
+        self.timeouts = {}
+        self._next_id = 0
+
+    def __call__(self):
+        return self.now
+
+    def timeout_add(self, interval, callback):
+        self._next_id += 1
+        self.timeouts[self._next_id] = (self.now + interval * 1000, callback)
+        return self._next_id
+
+    def source_remove(self, source_id):
+        del self.timeouts[source_id]
+
+    def advance(self, milliseconds):
+        self.now += milliseconds * 1000
+        for source_id, (due, callback) in list(self.timeouts.items()):
+            if due <= self.now and source_id in self.timeouts:
+                del self.timeouts[source_id]
+                callback()
+
+
+def drag(on_release, motions=50, step=10, interval=100):
+    """
+    press, move the slider every step milliseconds - each motion also
+    changes the value - then release
+    :return: positions seeked to, positions previewed
+    """
+    player = Player()
+    clock = Clock()
+    clock.now = 10 ** 9
+    previews = []
+    position = [0]
+
+    throttle = SeekThrottle(
+        lambda: player.set_playing_time(position[0]),
+        lambda: previews.append(position[0]),
+        interval=interval, on_release=on_release, clock=clock,
+        timeout_add=clock.timeout_add, source_remove=clock.source_remove)
+
+    throttle.press()
+    for i in range(1, motions + 1):
+        clock.advance(step)
+        position[0] = i
+        throttle.request()
+        throttle.motion()
+    throttle.release()
+    clock.advance(interval * 2)
+
+    return player.seeks, previews
+
+
+def test_drag_seeks_once_per_interval():
+    seeks, previews = drag(on_release=False)
+
+    # 500ms of dragging - the first seek is immediate, then one per 100ms
+    # and the release applies the final position
+    assert len(seeks) == 6
+    assert seeks[0] == 1
+    assert seeks[-1] == 50
+    assert previews == []
+
+
+def test_drag_seeks_once_on_release():
+    seeks, previews = drag(on_release=True)
+
+    assert seeks == [50]
+    assert len(previews) == 100
+
+
+def test_click_without_motion_seeks_once():
+    player = Player()
+    clock = Clock()
+    clock.now = 10 ** 9
+    throttle = SeekThrottle(lambda: player.set_playing_time(7),
+                            lambda: None, clock=clock,
+                            timeout_add=clock.timeout_add,
+                            source_remove=clock.source_remove)
+
+    throttle.press()
+    throttle.request()
+    throttle.release()
+    clock.advance(1000)
+
+    assert player.seeks == [7]
+
+
+def test_cancel_drops_the_pending_seek():
+    player = Player()
+    clock = Clock()
+    throttle = SeekThrottle(lambda: player.set_playing_time(1),
+                            lambda: None, clock=clock,
+                            timeout_add=clock.timeout_add,
+                            source_remove=clock.source_remove)
+
+    throttle.request()
+    throttle.request()
+    throttle.cancel()
+    clock.advance(1000)
+
+    assert player.seeks == []